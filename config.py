@@ -1,20 +1,39 @@
-from matplotlib.colors import ListedColormap, BoundaryNorm
+import numpy as np
+from matplotlib.colors import ListedColormap, BoundaryNorm, to_rgba_array
 
-FIRE_CMAP = ListedColormap([
+# Cell-state colors, indexed by state; the colormaps, palettes and UI legends are all built from these
+FIRE_COLORS = (
     '#1d1d1d',  # 0: empty (matches dark background)
     '#1b5e20',  # 1: tree
     '#b71c1c',  # 2: fire
     '#1565c0',  # 3: suppressed (blue)
-])
-FIRE_NORM = BoundaryNorm([0, 1, 2, 3, 4], FIRE_CMAP.N)
-
-INH_CMAP = ListedColormap([
+)
+INH_COLORS = (
     '#1d1d1d',  # 0: empty
     '#1b5e20',  # 1: pine (dark green)
     '#4caf50',  # 2: oak (light green)
     '#b71c1c',  # 3: fire (red)
-])
+)
+
+FIRE_CMAP = ListedColormap(FIRE_COLORS)
+FIRE_NORM = BoundaryNorm([0, 1, 2, 3, 4], FIRE_CMAP.N)
+
+INH_CMAP = ListedColormap(INH_COLORS)
 INH_NORM = BoundaryNorm([0, 1, 2, 3, 4], INH_CMAP.N)
 
+# Raw RGBA lookup tables indexed by cell state, for rendering without a Normalize pass
+FIRE_PALETTE_U8 = (to_rgba_array(FIRE_COLORS) * 255).round().astype(np.uint8)
+FIRE_PALETTE_U8.flags.writeable = False
+
+INH_PALETTE_U8 = (to_rgba_array(INH_COLORS) * 255).round().astype(np.uint8)
+INH_PALETTE_U8.flags.writeable = False
+
 MAX_STEPS_FOR_TIME_LIMIT = 50_000_000
-RENDER_INTERVAL = 0.05
\ No newline at end of file
+RENDER_INTERVAL = 0.05
+GRID_DISPLAY_MAX = 256  # larger grids are block-reduced to at most this many cells per side for display
+STEPS_PER_BATCH = 64  # max simulation steps run between event-loop yields
+FIRE_HIST_BINS = 40  # log-spaced bins over [1, L^2] in the fire-size plot
+FIT_INTERVAL = 1.0  # min seconds between full powerlaw refits of the fire sizes
+FIT_GROWTH = 1.25  # refit only once the fire count has grown by this factor since the last fit
+FIT_MIN_FIRES = 50  # fires needed before the powerlaw fit replaces the running MLE
+MLE_X_MIN = 1  # lower cutoff for the power-law exponent estimate in the fire plot
\ No newline at end of file
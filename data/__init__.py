@@ -1,7 +1,11 @@
+from functools import lru_cache
 from pathlib import Path
 
+# __file__ is the path to this __init__.py file
+# e.g., /project/wildfires/data/__init__.py
+_DIR = Path(__file__).parent  # Gets /project/wildfires/data/
+
+
+@lru_cache(maxsize=None)
 def path(filename):
-    # __file__ is the path to this __init__.py file
-    # e.g., /project/wildfires/data/__init__.py
-    data_dir = Path(__file__).parent  # Gets /project/wildfires/data/
-    return data_dir / filename  # Returns /project/wildfires/data/filename
\ No newline at end of file
+    return _DIR / filename  # Returns /project/wildfires/data/filename
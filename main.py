@@ -1,13 +1,23 @@
 import asyncio
+import base64
+import io
 import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 
-import matplotlib.pyplot as plt
 import numpy as np
+import powerlaw
 from nicegui import ui
+from PIL import Image
 
 from simulations.drosselschwab import simulate_drosselschwab_steps
 from simulations.inhomogeneous import simulate_inhomogeneous_steps
-from config import FIRE_CMAP, FIRE_NORM, INH_CMAP, INH_NORM, MAX_STEPS_FOR_TIME_LIMIT, RENDER_INTERVAL
+from stats_kernels import fold_sizes, log_density, power_law_line
+from config import (
+    FIRE_COLORS, FIRE_HIST_BINS, FIRE_PALETTE_U8, FIT_GROWTH, FIT_INTERVAL, FIT_MIN_FIRES,
+    GRID_DISPLAY_MAX, INH_COLORS, INH_PALETTE_U8, MAX_STEPS_FOR_TIME_LIMIT, MLE_X_MIN,
+    RENDER_INTERVAL, STEPS_PER_BATCH,
+)
 from content import (
     INTRODUCTION_TITLE, INTRODUCTION_CONTENT,
     METHODOLOGY_TITLE, METHODOLOGY_CONTENT,
@@ -36,28 +46,6 @@ ui.add_head_html('''
 </style>
 ''')
 
-# =========================
-# Scientific plotting setup (dark)
-# =========================
-
-# Transparent figure/axes so matplotlib graphs match NiceGUI page background
-plt.style.use('dark_background')
-plt.rcParams.update({
-    'font.size': 9,
-    'axes.titlesize': 9,
-    'axes.labelsize': 9,
-    'xtick.labelsize': 8,
-    'ytick.labelsize': 8,
-    'figure.facecolor': 'none',
-    'axes.facecolor': 'none',
-    'savefig.facecolor': 'none',
-    'savefig.edgecolor': 'none',
-    'axes.edgecolor': '#333',
-    'axes.labelcolor': '#aaa',
-    'xtick.color': '#666',
-    'ytick.color': '#666',
-})
-
 # =========================
 # UI helpers
 # =========================
@@ -73,6 +61,37 @@ def labeled_slider(label, slider, fmt='{:.3g}'):
         ).classes('text-gray-500 text-sm tabular-nums')
 
 
+def fire_chart_options():
+    """Initial ECharts options for the log-log fire-size distribution pane (dark, transparent)."""
+    axis_style = {
+        'nameLocation': 'middle',
+        'nameTextStyle': {'color': '#aaa', 'fontSize': 12},
+        'axisLine': {'lineStyle': {'color': '#333'}},
+        'axisTick': {'lineStyle': {'color': '#333'}},
+        'axisLabel': {'color': '#666', 'fontSize': 11},
+        'splitLine': {'show': False},
+    }
+    return {
+        'animation': False,
+        'backgroundColor': 'transparent',
+        'grid': {'left': 70, 'right': 20, 'top': 20, 'bottom': 50},
+        'title': {
+            'show': False, 'text': '', 'left': 'center', 'top': 'middle',
+            'textStyle': {'color': '#666', 'fontSize': 12, 'fontWeight': 'normal'},
+        },
+        'legend': {'data': [], 'right': 10, 'top': 10, 'textStyle': {'color': '#aaa', 'fontSize': 11}},
+        'xAxis': {'type': 'log', 'name': 'Fire size s', 'nameGap': 30, 'min': 0.5, 'max': 1e4, **axis_style},
+        'yAxis': {'type': 'log', 'name': 'P(s)', 'nameGap': 50, 'min': 1e-6, 'max': 1e1, **axis_style},
+        'series': [
+            {'type': 'scatter', 'data': [], 'symbolSize': 6, 'itemStyle': {'color': '#e65100'}},
+            {
+                'type': 'line', 'name': '', 'data': [], 'showSymbol': False,
+                'lineStyle': {'type': 'dashed', 'width': 1.5, 'color': '#888'}, 'itemStyle': {'color': '#888'},
+            },
+        ],
+    }
+
+
 def create_simulation_panel(show_suppress=False, mode=None):
     """
     Factory function to create a simulation panel with controls and plots.
@@ -117,7 +136,7 @@ def create_simulation_panel(show_suppress=False, mode=None):
 
             panel['pause_requested'] = [False]
             panel['reset_requested'] = [False]
-            panel['paused_state'] = {'grid': None, 'fire_sizes': None, 'step': None}
+            panel['paused_state'] = {'grid': None, 'fire_sizes': None, 'step': None, 'fire_stats': None}
 
             with ui.row().classes('gap-2 mt-2'):
                 panel['run_button'] = ui.button('Run', color='orange').classes('min-w-20')
@@ -128,21 +147,31 @@ def create_simulation_panel(show_suppress=False, mode=None):
         # ---- Plots (larger, next to controls) ----
         with ui.row().classes('gap-4 items-start flex-wrap justify-center'):
             with ui.column().classes('items-center gap-1'):
-                panel['grid_plot'] = ui.pyplot(figsize=(5.5, 4), close=False)
+                # Grid is streamed as a palette PNG; pixelated so cells stay crisp when scaled
+                panel['grid_plot'] = ui.image().style(
+                    'width: 400px; height: 400px; image-rendering: pixelated'
+                ).props('fit=contain no-transition no-spinner')
+                # Run parameters are set once per run; only the step counter changes between frames
+                with ui.row().classes('items-center gap-1 text-xs text-gray-400'):
+                    panel['grid_caption'] = ui.label()
+                    panel['grid_step'] = ui.label()
                 with ui.row().classes('items-center gap-4 text-xs text-gray-500'):
-                    ui.label('■').style('color: #1d1d1d; -webkit-text-stroke: 1px #666;')
+                    colors = INH_COLORS if mode == 'inhomogeneous' else FIRE_COLORS
+                    ui.label('■').style(f'color: {colors[0]}; -webkit-text-stroke: 1px #666;')
                     ui.label('Empty')
-                    ui.label('■').style('color: #1b5e20')
+                    ui.label('■').style(f'color: {colors[1]}')
                     ui.label('Pine' if mode == 'inhomogeneous' else 'Tree')
                     if mode == 'inhomogeneous':
-                        ui.label('■').style('color: #4caf50')
+                        ui.label('■').style(f'color: {colors[2]}')
                         ui.label('Oak')
-                    ui.label('■').style('color: #b71c1c')
+                    fire_state = 3 if mode == 'inhomogeneous' else 2
+                    ui.label('■').style(f'color: {colors[fire_state]}')
                     ui.label('Fire')
                     if show_suppress:
-                        ui.label('■').style('color: #1565c0')
+                        ui.label('■').style(f'color: {colors[3]}')
                         ui.label('Suppressed')
-            panel['fire_plot'] = ui.pyplot(figsize=(5.5, 4), close=False)
+            # Fire-size distribution is drawn client-side; only the point data goes over the websocket
+            panel['fire_plot'] = ui.echart(fire_chart_options()).style('width: 550px; height: 400px')
 
     panel['advanced_state'] = True
     return panel
@@ -204,77 +233,100 @@ with ui.column().classes('w-full min-h-screen items-center justify-center gap-8
 # =========================
 
 
+# One single-worker pool per pane, so each pane's state is only ever touched by one thread
+_GRID_DRAW_POOL = ThreadPoolExecutor(max_workers=1)
+_FIRE_DRAW_POOL = ThreadPoolExecutor(max_workers=1)
+_FIT_POOL = ThreadPoolExecutor(max_workers=1)
+
+# powerlaw's optimizer is noisy about its starting guesses on every refit
+warnings.filterwarnings('ignore', module='powerlaw')
+
+
+def _fit_power_law(fire_sizes):
+    """Fit a discrete power law to the positive fire sizes. Returns (alpha, xmin), or None if there is too little data."""
+    fs = np.asarray(fire_sizes)
+    fs = fs[fs > 0]
+    if fs.size < FIT_MIN_FIRES or np.unique(fs).size < 2:
+        return None
+    try:
+        fit = powerlaw.Fit(fs, discrete=True, verbose=False)
+        return fit.power_law.alpha, fit.power_law.xmin
+    except ValueError:
+        # The xmin scan can leave an empty tail on small or degenerate samples
+        return None
+
+
+def _grid_png(img):
+    """Encode the palette image of the grid as a PNG data URI."""
+    with io.BytesIO() as output:
+        img.save(output, format='PNG', optimize=False, compress_level=1)
+        return 'data:image/png;base64,' + base64.b64encode(output.getvalue()).decode('ascii')
+
+
 def _init_grid_plot(panel, L_val):
-    """Initialize grid plot artists once. Returns (fig, ax, img)."""
-    cmap = INH_CMAP if panel.get('mode') == 'inhomogeneous' else FIRE_CMAP
-    norm = INH_NORM if panel.get('mode') == 'inhomogeneous' else FIRE_NORM
-    with panel['grid_plot']:
-        plt.clf()
-        fig, ax = plt.gcf(), plt.gca()
-        fig.patch.set_facecolor('none')
-        ax.patch.set_facecolor('none')
-        img = ax.imshow(
-            np.zeros((L_val, L_val), dtype=np.int8),
-            cmap=cmap,
-            norm=norm,
-        )
-        ax.set_xticks([])
-        ax.set_yticks([])
-        for spine in ax.spines.values():
-            spine.set_edgecolor('#666')
-            spine.set_linewidth(1)
-        ax.set_xlabel('')
-        plt.tight_layout(pad=0.2)
-    return fig, ax, img
-
-
-def _init_fire_plot(panel):
-    """Initialize fire-size distribution plot artists once. Returns (fig, ax, line, trendline, no_data_text)."""
-    with panel['fire_plot']:
-        plt.clf()
-        fig, ax = plt.gcf(), plt.gca()
-        fig.patch.set_facecolor('none')
-        ax.patch.set_facecolor('none')
-        ax.set_xlabel('Fire size $s$')
-        ax.set_ylabel('$P(s)$')
-        ax.set_xscale('log')
-        ax.set_yscale('log')
-        ax.set_xlim(0.5, 1e4)
-        ax.set_ylim(1e-6, 1e1)
-        line, = ax.loglog([], [], marker='o', linestyle='none', markersize=4, color='#e65100')
-        trendline, = ax.loglog([], [], linestyle='--', linewidth=1.5, color='#888', label='')
-        no_data_text = ax.text(
-            0.5, 0.5, 'No fires observed',
-            ha='center', va='center', transform=ax.transAxes,
-            fontsize=9, color='#b71c1c',
-        )
-        plt.tight_layout(pad=0.5)
-    return fig, ax, line, trendline, no_data_text
+    """Prepare the grid pane for a run. Returns (buf, img, stride)."""
+    palette = INH_PALETTE_U8 if panel.get('mode') == 'inhomogeneous' else FIRE_PALETTE_U8
+    # Large grids are shown at most GRID_DISPLAY_MAX cells wide; the pane is smaller than that anyway
+    stride = -(-L_val // GRID_DISPLAY_MAX)
+    n = L_val // stride
+    # Persistent buffer the (reduced) simulation grid is written into before each encode;
+    # the palette image maps the same memory, so the lookup table is attached only once
+    buf = np.zeros((n, n), dtype=np.uint8)
+    img = Image.frombuffer('P', (n, n), buf, 'raw', 'P', 0, 1)
+    img.putpalette(palette.tobytes(), 'RGBA')
+    panel['grid_step'].set_text('')
+    return buf, img, stride
+
+
+def _reduce_grid(grid, stride, out):
+    """Write grid into out, keeping the highest cell state of every stride x stride block so fires stay visible."""
+    if stride == 1:
+        np.copyto(out, grid, casting='unsafe')
+        return
+    n = out.shape[0]
+    blocks = grid[:n * stride, :n * stride].reshape(n, stride, n, stride)
+    np.max(blocks, axis=(1, 3), out=out)
+
+
+def _show_fire_message(panel, message):
+    """Empty the fire-size chart and show a centered message instead."""
+    chart = panel['fire_plot']
+    chart.options['series'][0]['data'] = []
+    chart.options['series'][1]['data'] = []
+    chart.options['legend']['data'] = []
+    chart.options['title'].update(show=True, text=message)
+    chart.update()
+
+
+def _show_fire_data(panel, points, trend, tau_label, x_range, y_range):
+    """Show binned fire-size densities and the power-law trendline in the fire-size chart."""
+    chart = panel['fire_plot']
+    legend = [tau_label] if trend else []
+    # The stored options are kept in sync (for clients that connect later) without pushing them;
+    # only the changed data and axis ranges go out, and ECharts merges them into the live chart
+    with chart.props.suspend_updates():
+        chart.options['series'][0]['data'] = points
+        chart.options['series'][1]['data'] = trend
+        chart.options['series'][1]['name'] = tau_label
+        chart.options['legend']['data'] = legend
+        chart.options['title']['show'] = False
+        chart.options['xAxis'].update(min=x_range[0], max=x_range[1])
+        chart.options['yAxis'].update(min=y_range[0], max=y_range[1])
+    chart.run_chart_method('setOption', {
+        'series': [{'data': points}, {'data': trend, 'name': tau_label}],
+        'legend': {'data': legend},
+        'title': {'show': False},
+        'xAxis': {'min': x_range[0], 'max': x_range[1]},
+        'yAxis': {'min': y_range[0], 'max': y_range[1]},
+    })
 
 
 def _clear_plots(panel):
     """Clear both plots to empty state (for RESET)."""
-    with panel['grid_plot']:
-        plt.clf()
-        fig, ax = plt.gcf(), plt.gca()
-        fig.patch.set_facecolor('none')
-        ax.patch.set_facecolor('none')
-        ax.set_xticks([])
-        ax.set_yticks([])
-        ax.text(0.5, 0.5, 'No data — Run or reset',
-                ha='center', va='center', transform=ax.transAxes,
-                fontsize=9, color='#666')
-    with panel['fire_plot']:
-        plt.clf()
-        fig, ax = plt.gcf(), plt.gca()
-        fig.patch.set_facecolor('none')
-        ax.patch.set_facecolor('none')
-        ax.set_xlabel('Fire size $s$')
-        ax.set_ylabel('$P(s)$')
-        ax.text(0.5, 0.5, 'No data — Run or reset',
-                ha='center', va='center', transform=ax.transAxes,
-                fontsize=9, color='#666')
-    plt.tight_layout(pad=0.2)
+    panel['grid_plot'].set_source('')
+    panel['grid_caption'].set_text('No data — Run or reset')
+    panel['grid_step'].set_text('')
+    _show_fire_message(panel, 'No data — Run or reset')
 
 
 def _update_run_resume_button(panel):
@@ -313,6 +365,7 @@ async def run_and_plot(panel, resume=False):
                     initial_grid=panel['paused_state']['grid'],
                     initial_fire_sizes=panel['paused_state']['fire_sizes'],
                     start_step=panel['paused_state']['step'],
+                    snapshot=False,
                 )
             else:
                 L_val = int(panel['L'].value)
@@ -324,6 +377,7 @@ async def run_and_plot(panel, resume=False):
                     oak_ratio=oak_ratio,
                     p_burn_oak=p_burn_oak,
                     advanced_state=advanced_state,
+                    snapshot=False,
                 )
         else:
             if resume and panel['paused_state']['grid'] is not None:
@@ -338,6 +392,7 @@ async def run_and_plot(panel, resume=False):
                     initial_grid=panel['paused_state']['grid'],
                     initial_fire_sizes=panel['paused_state']['fire_sizes'],
                     start_step=panel['paused_state']['step'],
+                    snapshot=False,
                 )
             else:
                 L_val = int(panel['L'].value)
@@ -348,95 +403,179 @@ async def run_and_plot(panel, resume=False):
                     steps=MAX_STEPS_FOR_TIME_LIMIT,
                     suppress=suppress_val,
                     advanced_state=advanced_state,
+                    snapshot=False,
                 )
 
-        grid_fig, grid_ax, grid_img = _init_grid_plot(panel, L_val)
-        fire_fig, fire_ax, fire_line, fire_trendline, fire_no_data_text = _init_fire_plot(panel)
+        grid_buf, grid_pil, grid_stride = _init_grid_plot(panel, L_val)
+        label = f'L={L_val}, p={panel["p"].value:.3g}, f={panel["f"].value:.3g}'
+        if suppress_val > 0:
+            label += f', suppress={suppress_val}'
+        if is_inhomogeneous:
+            label += f', oak={oak_ratio:.2g}, p_burn_oak={p_burn_oak:.2g}'
+        panel['grid_caption'].set_text(label)
+        _show_fire_message(panel, 'No fires observed')
+
+        # Fire sizes are bounded by 1..L^2, so the log-spaced bins are fixed for the whole run
+        fire_log_edges = np.linspace(0.0, np.log(L_val * L_val), FIRE_HIST_BINS + 1)
+        fire_edges = np.exp(fire_log_edges)
+        fire_edges[-1] = L_val * L_val  # exact, so a fire spanning the whole grid lands in the last bin
+        centers = np.exp(0.5 * (fire_log_edges[:-1] + fire_log_edges[1:]))
+
+        # Running fire statistics, so each frame only folds in the fires since the previous one:
+        # bin counts with the count/min/max of positive sizes, and the count and sum of
+        # ln(s / (x_min - 0.5)) for the discrete power-law MLE (Clauset et al. 2009).
+        # Carried over on resume.
+        if resume and panel['paused_state']['fire_stats'] is not None:
+            (fires_seen, fire_counts, fires_binned, min_s, max_s,
+             mle_n, mle_log_sum) = panel['paused_state']['fire_stats']
+            # The paused state may be resumed again later, so keep its counts untouched
+            fire_counts = fire_counts.copy()
+        else:
+            fires_seen = 0
+            fire_counts = np.zeros(FIRE_HIST_BINS, dtype=np.int64)
+            fires_binned, min_s, max_s = 0, 0, 0
+            mle_n, mle_log_sum = 0, 0.0
 
         last_render_time = 0.0
+        last_fire_count = -1
+        last_fit = None
+        last_grid_step = -1
+        power_fit = None
+        fit_future = None
+        last_fit_time = 0.0
+        fit_fire_count = 0
         current_grid = None
         current_fire_sizes = []
         current_step = 0
 
-        for grid, fire_sizes, step_i in gen:
-            now = time.monotonic()
-            elapsed = now - start_time
-
-            current_grid = grid
-            current_fire_sizes = fire_sizes
-            current_step = step_i
+        def _draw_grid(grid, step_i):
+            nonlocal last_grid_step
+            if step_i == last_grid_step:
+                return None
+            last_grid_step = step_i
+            _reduce_grid(grid, grid_stride, grid_buf)
+            return _grid_png(grid_pil)
+
+        def _draw_fire(fire_sizes, fit):
+            nonlocal last_fire_count, last_fit, fires_seen, fires_binned, min_s, max_s, mle_n, mle_log_sum
+            last_fire_count = len(fire_sizes)
+            last_fit = fit
+            new_sizes = np.asarray(fire_sizes[fires_seen:], dtype=np.int64)
+            fires_seen = len(fire_sizes)
+
+            n_new, new_min, new_max, mle_n_new, mle_log_sum_new = fold_sizes(
+                new_sizes, fire_counts, fire_edges, MLE_X_MIN)
+            mle_n += mle_n_new
+            mle_log_sum += mle_log_sum_new
+            if n_new > 0:
+                min_s = new_min if fires_binned == 0 else min(min_s, new_min)
+                max_s = max(max_s, new_max)
+                fires_binned += n_new
+            if fires_binned == 0:
+                return None
+            x_fit, y_fit = log_density(fire_counts, fire_edges, centers, fires_binned)
+
+            log_min = np.log(max(1, min_s))
+            log_max = np.log(max_s)
+            if log_max <= log_min:
+                log_max = log_min + 1.0
+
+            # Prefer the full powerlaw fit; fall back to the running MLE until one is available
+            if fit is not None:
+                alpha, x_min = fit
+            elif mle_n > 0 and mle_log_sum > 0:
+                alpha, x_min = 1.0 + mle_n / mle_log_sum, MLE_X_MIN
+            else:
+                alpha = None
+            trend = []
+            tau_label = ''
+            if alpha is not None:
+                # Anchor the power law s^-alpha at the first populated bin at or above x_min
+                anchor = min(np.searchsorted(x_fit, x_min), len(x_fit) - 1)
+                log_start = min(max(log_min, np.log(x_min)), log_max)
+                trend = power_law_line(x_fit[anchor], y_fit[anchor], alpha, log_start, log_max, 50).tolist()
+                tau_label = f'τ = {alpha:.2f}'
+
+            points = np.column_stack((x_fit, y_fit)).tolist()
+            x_range = (0.5 * float(min_s), 2.0 * float(max_s))
+            y_range = (0.5 * float(y_fit.min()), 2.0 * float(y_fit.max()))
+            return points, trend, tau_label, x_range, y_range
+
+        finished = False
+        while not finished:
+            # Advance the simulation in a tight batch without yielding to the event loop;
+            # only the most recent step is kept for display. The generators yield their live
+            # grid and fire list (snapshot=False); both stay untouched while a frame is drawn,
+            # since the generator is not advanced until the draws have been awaited
+            render_due = False
+            for _ in range(STEPS_PER_BATCH):
+                item = next(gen, None)
+                if item is None:
+                    finished = True
+                    break
+                current_grid, current_fire_sizes, current_step = item
+                now = time.monotonic()
+                if now - start_time >= max_seconds:
+                    finished = True
+                    break
+                if now - last_render_time >= RENDER_INTERVAL:
+                    render_due = True
+                    break
 
-            if elapsed >= max_seconds:
+            if finished:
                 break
 
-            if now - last_render_time < RENDER_INTERVAL:
-                if panel['pause_requested'][0]:
-                    break
-                await asyncio.sleep(0)
-                continue
-
-            last_render_time = now
-
-            with panel['grid_plot']:
-                grid_img.set_data(grid)
-                label = f'L={L_val}, p={panel["p"].value:.3g}, f={panel["f"].value:.3g}'
-                if suppress_val > 0:
-                    label += f', suppress={suppress_val}'
-                if is_inhomogeneous:
-                    label += f', oak={panel["oak_ratio"].value:.2g}, p_burn_oak={panel["p_burn_oak"].value:.2g}'
-                label += f' (step {step_i})'
-                grid_ax.set_xlabel(label)
-
-            with panel['fire_plot']:
-                # Filter out zero-size fires (fully suppressed)
-                fs = np.asarray([s for s in fire_sizes if s > 0])
-                if len(fs) == 0:
-                    fire_line.set_data([], [])
-                    fire_trendline.set_data([], [])
-                    fire_no_data_text.set_visible(True)
-                else:
-                    fire_no_data_text.set_visible(False)
-                    min_s = max(1, fs.min())
-                    max_s = fs.max()
-
-                    log_min = np.log(min_s)
-                    log_max = np.log(max_s)
-                    if log_max <= log_min:
-                        log_max = log_min + 1.0
-
-                    bins = np.exp(np.linspace(log_min, log_max, num=20))
-                    hist, edges = np.histogram(fs, bins=bins, density=True)
-                    centers = np.sqrt(edges[:-1] * edges[1:])
-
-                    mask = hist > 0
-                    fire_line.set_data(centers[mask], hist[mask])
-
-                    x_fit = centers[mask]
-                    y_fit = hist[mask]
-                    if len(x_fit) >= 2:
-                        slope, intercept = np.polyfit(np.log(x_fit), np.log(y_fit), 1)
-                        trend_x = np.exp(np.linspace(log_min, log_max, 50))
-                        trend_y = np.exp(slope * np.log(trend_x) + intercept)
-                        fire_trendline.set_data(trend_x, trend_y)
-                        fire_trendline.set_label(f'$\\tau$ = {-slope:.2f}')
-                        fire_ax.legend(loc='upper right', fontsize=8, framealpha=0.5)
+            if render_due:
+                last_render_time = now
+                step_i = current_step
+
+                loop = asyncio.get_running_loop()
+
+                # Refit the power law in the background at most every FIT_INTERVAL seconds, and only once
+                # the fire count has grown by FIT_GROWTH since the last fit (tau settles as fires pile up);
+                # the trendline keeps the previous fit (or the running MLE) in between
+                if fit_future is not None and fit_future.done():
+                    power_fit = fit_future.result() or power_fit
+                    fit_future = None
+                if fit_future is None and now - last_fit_time >= FIT_INTERVAL \
+                        and len(current_fire_sizes) > FIT_GROWTH * fit_fire_count:
+                    # The fit outlives this frame, so it gets its own copy of the fire list
+                    fit_future = loop.run_in_executor(_FIT_POOL, _fit_power_law, list(current_fire_sizes))
+                    last_fit_time = now
+                    fit_fire_count = len(current_fire_sizes)
+
+                # Both panes prepare their frame concurrently in their own worker thread while the event
+                # loop stays free (PNG encode / histogram + trendline). The fire pane is only redrawn when a fire happened or a new power-law fit came in;
+                # during quiet stretches it is not even handed to its worker.
+                draws = [loop.run_in_executor(_GRID_DRAW_POOL, _draw_grid, current_grid, step_i)]
+                if len(current_fire_sizes) != last_fire_count or power_fit is not last_fit:
+                    draws.append(loop.run_in_executor(_FIRE_DRAW_POOL, _draw_fire, current_fire_sizes, power_fit))
+                grid_src, *fire_data = await asyncio.gather(*draws)
+                if grid_src is not None:
+                    panel['grid_plot'].set_source(grid_src)
+                panel['grid_step'].set_text(f'(step {step_i})')
+                if fire_data:
+                    if fire_data[0] is None:
+                        _show_fire_message(panel, 'No fires observed')
                     else:
-                        fire_trendline.set_data([], [])
-
-                    fire_ax.set_xlim(0.5 * min_s, 2 * max_s)
-                    hist_positive = hist[mask]
-                    if len(hist_positive) > 0:
-                        fire_ax.set_ylim(0.5 * hist_positive.min(), 2 * hist_positive.max())
-
-            await asyncio.sleep(0.01)
+                        _show_fire_data(panel, *fire_data[0])
+            else:
+                # A full batch without a render: hand control back once so the UI stays responsive
+                # (a render already awaited its workers above, so it needs no extra hop)
+                await asyncio.sleep(0)
 
             if panel['pause_requested'][0]:
                 break
 
         if panel['pause_requested'][0] and current_grid is not None:
-            panel['paused_state']['grid'] = np.copy(current_grid)
-            panel['paused_state']['fire_sizes'] = list(current_fire_sizes)
+            # The generator's live state is abandoned with it here, and resuming copies it into a new
+            # generator, so it can be handed over as-is
+            panel['paused_state']['grid'] = current_grid
+            panel['paused_state']['fire_sizes'] = current_fire_sizes
             panel['paused_state']['step'] = current_step
+            panel['paused_state']['fire_stats'] = (
+                fires_seen, fire_counts, fires_binned, min_s, max_s, mle_n, mle_log_sum,
+            )
 
     finally:
         panel['run_button'].enable()
@@ -458,7 +597,10 @@ def wire_panel_callbacks(panel):
         panel['paused_state']['grid'] = None
         panel['paused_state']['fire_sizes'] = None
         panel['paused_state']['step'] = None
-        _clear_plots(panel)
+        panel['paused_state']['fire_stats'] = None
+        # A running sim clears the plots itself once its in-flight draw has finished
+        if panel['run_button'].enabled:
+            _clear_plots(panel)
         _update_run_resume_button(panel)
 
     async def on_run_or_resume():
@@ -474,4 +616,6 @@ wire_panel_callbacks(basic_panel)
 wire_panel_callbacks(supp_panel)
 wire_panel_callbacks(inhom_panel)
 
-ui.run(dark=True)
\ No newline at end of file
+# Only start the server when run as a script, so importing main (e.g. for tooling) has no side effects beyond the UI tree
+if __name__ in {'__main__', '__mp_main__'}:
+    ui.run(dark=True)
\ No newline at end of file
@@ -1,13 +1,20 @@
 """Utility functions for Drossel-Schwab model experiment notebooks."""
 
 import csv
-import json
+import os
 import re
 from datetime import datetime
+from itertools import chain
 from pathlib import Path
 
+import matplotlib.pyplot as plt
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
 import data
-import results
 
 
 # =============================================================================
@@ -35,39 +42,63 @@ def get_latest_experiment_dir(experiment_name: str) -> Path:
     if not base_dir.exists():
         raise FileNotFoundError(f"Base directory not found: {base_dir}")
     
-    exp_dirs = [d for d in base_dir.iterdir() if d.is_dir() and d.name.startswith('experiment_')]
+    with os.scandir(base_dir) as it:
+        exp_dirs = [e.name for e in it if e.name.startswith('experiment_') and e.is_dir()]
     if not exp_dirs:
         raise FileNotFoundError(f"No experiment directories found under {base_dir}")
     
-    return max(exp_dirs, key=lambda d: int(d.name.split('_')[-1])).resolve()
+    return (base_dir / max(exp_dirs, key=lambda n: int(n.split('_')[-1]))).resolve()
 
 
 # =============================================================================
 # Simulation Execution
 # =============================================================================
 
+_OUTDIR = None
+_WORKER = None
+
+
+def _init_sim_process(outdir):
+    """Pool initializer: set the output directory and import the worker once per process."""
+    global _OUTDIR, _WORKER
+    from scripts.parallel_sims import worker
+    _OUTDIR, _WORKER = outdir, worker
+
+
+def _run_sim(params):
+    """Run one parameter set in a pool process. Returns (params, result, error)."""
+    try:
+        return params, _WORKER(_OUTDIR, params), None
+    except Exception as e:
+        return params, None, e
+
+
 def run_parallel_simulations(param_list: list, outdir: Path) -> list:
     """Run simulations in parallel. Returns list of result dicts."""
-    import os
     import multiprocessing
-    from concurrent.futures import ProcessPoolExecutor, as_completed
-    from scripts.parallel_sims import worker
+    from concurrent.futures import ProcessPoolExecutor
     
     max_workers = int(os.environ.get('MAX_WORKERS', multiprocessing.cpu_count()))
     print(f"Running {len(param_list)} simulations with up to {max_workers} workers...")
     
+    # Longest jobs first (cost ~ L^2 * steps), so the short ones fill in the tail of the sweep
+    param_list = sorted(param_list, key=lambda d: -(int(d.get('L', 64)) ** 2 * int(d.get('steps', 500))))
+    
+    # outdir travels once per process via the initializer; small tasks are sent in chunks
+    chunksize = max(1, len(param_list) // (max_workers * 4))
     sim_results = []
-    with ProcessPoolExecutor(max_workers=max_workers) as exe:
-        futures = {exe.submit(worker, outdir, params): params for params in param_list}
-        for fut in as_completed(futures):
-            params = futures[fut]
-            try:
-                res = fut.result()
-                print(f"Done: L={res['L']}, p={res['p']}, f={res['f']}, suppress={res['suppress']},"
-                      f"fires={res['num_fires']}, mean={res['mean_size']:.2f}, max={res['max_size']}")
-                sim_results.append(res)
-            except Exception as e:
-                print(f"Error for params {params}: {e}")
+    # One single-threaded worker per core, started from a forkserver (workers start as tasks are submitted)
+    from scripts.parallel_sims import mp_context, single_threaded_workers
+    with single_threaded_workers(), \
+            ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context(),
+                                initializer=_init_sim_process, initargs=(outdir,)) as exe:
+        for params, res, err in exe.map(_run_sim, param_list, chunksize=chunksize):
+            if err is not None:
+                print(f"Error for params {params}: {err}")
+                continue
+            print(f"Done: L={res['L']}, p={res['p']}, f={res['f']}, suppress={res['suppress']},"
+                  f"fires={res['num_fires']}, mean={res['mean_size']:.2f}, max={res['max_size']}")
+            sim_results.append(res)
     
     return sim_results
 
@@ -76,13 +107,13 @@ def save_summary(sim_results: list, outdir: Path) -> Path:
     """Save summary CSV with all simulation results."""
     summary_file = outdir / f"summary_{datetime.now().strftime('%Y%m%dT%H%M%SZ')}.csv"
     keys = ['L', 'p', 'f', 'steps', 'suppress', 'param_id', 'run_id', 'num_fires',
-            'mean_size', 'max_size', 'remaining_trees', 'raw_file', 'perstep_file']
+            'mean_size', 'max_size', 'remaining_trees', 'raw_file', 'perstep_file', 'seed']
     
+    rows = [{k: r.get(k, '') for k in keys} for r in sim_results]
     with open(summary_file, 'w', newline='') as fh:
         writer = csv.DictWriter(fh, keys)
         writer.writeheader()
-        for r in sim_results:
-            writer.writerow({k: r.get(k, '') for k in keys})
+        writer.writerows(rows)
     
     print(f"Summary written to {summary_file}")
     return summary_file
@@ -92,35 +123,54 @@ def save_summary(sim_results: list, outdir: Path) -> Path:
 # Data Loading
 # =============================================================================
 
+# perstep_param{param_id}_..._id{run_id}_{timestamp}.csv, anchored at the start of the name
+_PERSTEP_NAME = re.compile(r'perstep_param(?P<param>\d+)_.*_id(?P<run>\d+)_', re.ASCII)
+
+
+def _scan_files(exp_dir: Path, prefix: str, suffix) -> list:
+    """Sorted paths of the regular files in exp_dir named prefix...suffix (suffix may be a tuple)."""
+    with os.scandir(exp_dir) as it:
+        names = [e.name for e in it
+                 if e.name.startswith(prefix) and e.name.endswith(suffix) and e.is_file(follow_symlinks=False)]
+    names.sort()
+    return [exp_dir / n for n in names]
+
+
 def load_experiment_data(exp_dir: Path) -> dict:
     """Load all per-step files from experiment directory.
     
-    Returns dict: param_id -> list of {run_id, fires_all, clusters_all, density_series}
+    Returns dict: param_id -> list of {run_id, fires_all, clusters_all, density_series},
+    where fires_all and clusters_all are int64 arrays and density_series is a float64 array
+    (NaN for steps without a recorded density).
     """
-    perstep_files = sorted(exp_dir.glob('perstep_param*_*.csv'))
+    perstep_files = _scan_files(exp_dir, 'perstep_param', ('.csv', '.csv.gz'))
     print(f"Found {len(perstep_files)} per-step files in {exp_dir}")
     
-    pattern = re.compile(r'perstep_param(?P<param>\d+)_.*_id(?P<run>\d+)_')
     runs_by_param = {}
     
     for fp in perstep_files:
-        m = pattern.search(fp.name)
+        m = _PERSTEP_NAME.match(fp.name)
         if not m:
             continue
         
         pid, rid = int(m.group('param')), int(m.group('run'))
         
-        # Load and aggregate data
-        fires_all, clusters_all, density_series = [], [], []
-        with open(fp, newline='') as fh:
-            reader = csv.reader(fh)
-            next(reader, None)  # skip header
-            for row in reader:
-                if not row:
-                    continue
-                fires_all.extend(json.loads(row[1]) if row[1] else [])
-                clusters_all.extend(json.loads(row[2]) if row[2] else [])
-                density_series.append(float(row[3]) if row[3] else None)
+        # Prefer the Parquet sidecar written by newer runs; older experiments only have the CSV
+        parquet_fp = fp.with_name(fp.name.removesuffix('.gz')).with_suffix('.parquet')
+        if parquet_fp.exists():
+            tbl = pq.read_table(parquet_fp, columns=['fires', 'clusters', 'density'])
+            fires_all = pc.list_flatten(tbl['fires']).to_numpy()
+            clusters_all = pc.list_flatten(tbl['clusters']).to_numpy()
+            density_series = tbl['density'].to_numpy()  # nulls come back as NaN
+        else:
+            # Load and aggregate data: C tokenizer for the CSV, orjson for the embedded lists
+            df = pd.read_csv(fp, header=0, usecols=[1, 2, 3], names=['fires', 'clusters', 'density'],
+                             dtype={'fires': str, 'clusters': str, 'density': 'float64'}, engine='c')
+            fires_all = np.fromiter(chain.from_iterable(orjson.loads(x) for x in df['fires'].dropna()),
+                                    dtype=np.int64)
+            clusters_all = np.fromiter(chain.from_iterable(orjson.loads(x) for x in df['clusters'].dropna()),
+                                       dtype=np.int64)
+            density_series = df['density'].to_numpy(dtype=np.float64)  # missing densities come back as NaN
         
         runs_by_param.setdefault(pid, []).append({
             'run_id': rid,
@@ -136,11 +186,12 @@ def load_experiment_data(exp_dir: Path) -> dict:
 def load_summary_map(exp_dir: Path) -> dict:
     """Load param_id -> {L, p, f} mapping from summary file."""
     summary_map = {}
-    summaries = list(exp_dir.glob('summary_*.csv'))
+    summaries = _scan_files(exp_dir, 'summary_', '.csv')
     if not summaries:
         return summary_map
     
-    latest = max(summaries, key=lambda p: p.stat().st_mtime)
+    # summary_%Y%m%dT%H%M%SZ.csv names sort chronologically, and the scan returns them sorted
+    latest = summaries[-1]
     with open(latest, newline='') as fh:
         for row in csv.DictReader(fh):
             try:
@@ -167,30 +218,33 @@ def plot_size_distribution(runs_by_param: dict, data_key: str = 'fires_all',
                            summary_map: dict = None, title: str = "Size Distribution",
                            xlabel: str = "Size", save_path: Path = None):
     """Plot log-log size distribution. data_key is 'fires_all' or 'clusters_all'."""
-    import numpy as np
-    import matplotlib.pyplot as plt
-    
-    # Collect all data for global bins
-    all_data = []
-    for runs in runs_by_param.values():
-        for r in runs:
-            all_data.extend(r[data_key])
-    
-    if not all_data:
+    # Flatten all runs once; offsets mark where each param_id's data starts
+    pids = [pid for pid in sorted(runs_by_param.keys())
+            if any(len(r[data_key]) for r in runs_by_param[pid])]
+    per_pid = [np.concatenate([r[data_key] for r in runs_by_param[pid]]) for pid in pids]
+    if not per_pid:
         print(f"No {data_key} recorded")
         return
     
-    all_data = np.array(all_data)
+    all_data = np.concatenate(per_pid)
+    offsets = np.cumsum([0] + [a.size for a in per_pid])
     bins = np.logspace(np.log10(max(1, all_data.min())), np.log10(all_data.max()), num=25)
+    nbins = bins.size - 1
     
+    # Bin everything in one pass, with np.histogram's edges: [lo, hi) and the last bin closed
+    bin_idx = np.searchsorted(bins, all_data, side='right') - 1
+    bin_idx[all_data == bins[-1]] = nbins - 1
+    pid_idx = np.repeat(np.arange(len(pids)), np.diff(offsets))
+    in_range = (bin_idx >= 0) & (bin_idx < nbins)
+    counts = np.bincount(pid_idx[in_range] * nbins + bin_idx[in_range],
+                         minlength=len(pids) * nbins).reshape(len(pids), nbins)
+    
+    centers = np.sqrt(bins[:-1] * bins[1:])
+    widths = np.diff(bins)
     plt.figure(figsize=(10, 6))
-    for pid in sorted(runs_by_param.keys()):
-        agg = np.concatenate([np.array(r[data_key]) for r in runs_by_param[pid] if r[data_key]])
-        if agg.size == 0:
-            continue
-        
-        hist, edges = np.histogram(agg, bins=bins, density=True)
-        centers = np.sqrt(edges[:-1] * edges[1:])
+    for i, pid in enumerate(pids):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            hist = counts[i] / (counts[i].sum() * widths)
         mask = hist > 0
         plt.loglog(centers[mask], hist[mask], 'o-', label=_make_label(pid, summary_map))
     
@@ -222,28 +276,31 @@ def plot_cluster_size_distribution(runs_by_param: dict, summary_map: dict = None
 def plot_density_timeseries(runs_by_param: dict, summary_map: dict = None,
                             title: str = "Tree Density Over Time", save_path: Path = None):
     """Plot mean tree density over time, averaged across runs per parameter."""
-    import numpy as np
-    import matplotlib.pyplot as plt
-    
     plt.figure(figsize=(10, 5))
     
     maxlen_global = 0
     param_series = {}
     
     for pid in sorted(runs_by_param.keys()):
-        densities = [np.array(r['density_series'], dtype=float) 
-                     for r in runs_by_param[pid] if r['density_series']]
+        densities = [np.asarray(r['density_series'], dtype=float)
+                     for r in runs_by_param[pid] if len(r['density_series'])]
         if not densities:
             continue
         
         maxlen = max(arr.size for arr in densities)
         maxlen_global = max(maxlen_global, maxlen)
-        stacked = np.vstack([np.pad(arr, (0, maxlen - arr.size), constant_values=np.nan) 
-                             for arr in densities])
-        param_series[pid] = np.nanmean(stacked, axis=0)
+        # Running sum and count per step instead of a NaN-padded block; NaN densities are skipped
+        sum_ = np.zeros(maxlen, np.float64)
+        cnt = np.zeros(maxlen, np.int64)
+        for arr in densities:
+            valid = ~np.isnan(arr)
+            sum_[:arr.size] += np.where(valid, arr, 0.0)
+            cnt[:arr.size] += valid
+        param_series[pid] = np.divide(sum_, cnt, out=np.full(maxlen, np.nan), where=cnt > 0)
     
     for pid, series in param_series.items():
-        s = np.pad(series, (0, maxlen_global - series.size), constant_values=np.nan)
+        s = np.full(maxlen_global, np.nan)
+        s[:series.size] = series
         plt.plot(np.arange(maxlen_global), s, label=_make_label(pid, summary_map))
     
     plt.xlabel('Step')
@@ -1,14 +1,20 @@
 import json
 import csv
-import re
+import gzip
+import sys
+from itertools import chain
 from pathlib import Path
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+import pyarrow.parquet as pq
 
 # Determine project root reliably (parent of this scripts folder)
 project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+from scripts.parallel_sims import perstep_parquet_path, scan_perstep_files
+
 base_dir = (project_root / "data" / "f_over_p").resolve()
 if not base_dir.exists():
     raise FileNotFoundError(f"Base data directory not found: {base_dir}")
@@ -27,15 +33,21 @@ EXP_DIR = exp_dirs_sorted[-1].resolve()
 print('Experiment dir:', EXP_DIR)
 
 # find perstep files created by the worker
-perstep_files = sorted(EXP_DIR.glob('perstep_param*_*.csv'))
+perstep_files = scan_perstep_files(EXP_DIR)
 print(f'Found {len(perstep_files)} per-step files')
 
-pattern = re.compile(r'perstep_param(?P<param>\d+)_.*_id(?P<run>\d+)_')
-
 
 def load_perstep_file(fp):
+    # Runs written with the Parquet sidecar are read from it directly, without any JSON decoding
+    parquet_fp = perstep_parquet_path(fp)
+    if parquet_fp.exists():
+        cols = pq.read_table(parquet_fp, columns=['step', 'fires', 'clusters', 'density']).to_pydict()
+        return [{'step': step, 'fires': fires, 'clusters': clusters, 'density': density}
+                for step, fires, clusters, density
+                in zip(cols['step'], cols['fires'], cols['clusters'], cols['density'])]
+
     records = []
-    with open(fp, newline='') as fh:
+    with (gzip.open(fp, 'rt', newline='') if fp.suffix == '.gz' else open(fp, newline='')) as fh:
         reader = csv.reader(fh)
         try:
             header = next(reader)
@@ -51,73 +63,77 @@ def load_perstep_file(fp):
             records.append({'step': step, 'fires': fires, 'clusters': clusters, 'density': density})
     return records
 
+def density_hist(values, edges):
+    """np.histogram(values, edges, density=True)[0], via one searchsorted and bincount."""
+    nbins = edges.size - 1
+    idx = np.searchsorted(edges, values, side='right') - 1
+    idx[values == edges[-1]] = nbins - 1  # the last bin is closed on the right
+    idx = idx[(idx >= 0) & (idx < nbins)]
+    counts = np.bincount(idx, minlength=nbins)
+    return counts / (counts.sum() * np.diff(edges))
+
 runs_by_param = {}
-for fp in perstep_files:
-    m = pattern.search(fp.name)
-    if not m:
-        print('Skipping unknown file pattern:', fp.name)
-        continue
-    pid = int(m.group('param'))
-    rid = int(m.group('run'))
+for fp, pid, rid in perstep_files:
     recs = load_perstep_file(fp)
-    fires_all = []
-    clusters_all = []
-    density_series = []
-    for r in recs:
-        fires_all.extend(r['fires'])
-        clusters_all.extend(r['clusters'])
-        density_series.append(r['density'])
+    fires_all = np.fromiter(chain.from_iterable(r['fires'] for r in recs), dtype=np.int64)
+    clusters_all = np.fromiter(chain.from_iterable(r['clusters'] for r in recs), dtype=np.int64)
+    density_series = [r['density'] for r in recs]
     runs_by_param.setdefault(pid, []).append({'run_id': rid, 'file': fp, 'records': recs, 'fires_all': fires_all, 'clusters_all': clusters_all, 'density_series': density_series})
 
 print('Loaded runs for param_ids:', sorted(runs_by_param.keys()))
 
+# One flat array per param_id, shared by the per-run, aggregated and global statistics below
+fires_by_pid = {pid: np.concatenate([r['fires_all'] for r in runs]) for pid, runs in runs_by_param.items()}
+clusters_by_pid = {pid: np.concatenate([r['clusters_all'] for r in runs]) for pid, runs in runs_by_param.items()}
+all_fires_global = np.concatenate(list(fires_by_pid.values())) if fires_by_pid else np.array([])
+all_clusters_global = np.concatenate(list(clusters_by_pid.values())) if clusters_by_pid else np.array([])
+
 # create plots dir
 plots_dir = EXP_DIR / 'plots'
 plots_dir.mkdir(parents=True, exist_ok=True)
 
-# Fire-size distributions per param_id per run
+# Fire-size distributions per param_id per run; one figure is reused for every param_id
+fig, ax = plt.subplots(figsize=(7,4))
 for pid in sorted(runs_by_param.keys()):
     runs = runs_by_param[pid]
-    all_fs = np.concatenate([np.array(r['fires_all']) for r in runs if len(r['fires_all']) > 0]) if any(len(r['fires_all'])>0 for r in runs) else np.array([])
+    all_fs = fires_by_pid[pid]
     if all_fs.size == 0:
         print(f'param {pid}: no fires')
         continue
     min_s = max(1, int(all_fs.min()))
     max_s = int(all_fs.max())
     bins = np.logspace(np.log10(min_s), np.log10(max_s), num=20)
-    plt.figure(figsize=(7,4))
+    centers = np.sqrt(bins[:-1] * bins[1:])
+    ax.clear()
     for r in runs:
-        fs = np.array(r['fires_all'])
+        fs = r['fires_all']
         if fs.size == 0:
             continue
-        hist, edges = np.histogram(fs, bins=bins, density=True)
-        centers = np.sqrt(edges[:-1] * edges[1:])
+        hist = density_hist(fs, bins)
         mask = hist > 0
-        plt.loglog(centers[mask], hist[mask], marker='o', linestyle='-', label=f"run {r['run_id']}")
-    plt.title(f'Fire-size distributions for param_id {pid}')
-    plt.xlabel('Fire size')
-    plt.ylabel('Probability density')
-    plt.legend()
-    plt.tight_layout()
+        ax.loglog(centers[mask], hist[mask], marker='o', linestyle='-', label=f"run {r['run_id']}")
+    ax.set_title(f'Fire-size distributions for param_id {pid}')
+    ax.set_xlabel('Fire size')
+    ax.set_ylabel('Probability density')
+    ax.legend()
+    fig.tight_layout()
     outp = plots_dir / f'fire_dist_param{pid}.png'
-    plt.savefig(outp)
-    plt.close()
+    fig.savefig(outp)
     print('Saved', outp)
+plt.close(fig)
 
 # aggregated by param_id
-all_fires_global = np.concatenate([np.concatenate([np.array(r['fires_all']) for r in runs_by_param[pid] if len(r['fires_all'])>0]) for pid in runs_by_param.keys() if any(len(r['fires_all'])>0 for r in runs_by_param[pid])]) if any(any(len(r['fires_all'])>0 for r in runs_by_param[pid]) for pid in runs_by_param.keys()) else np.array([])
 if all_fires_global.size > 0:
     min_s = max(1, int(all_fires_global.min()))
     max_s = int(all_fires_global.max())
     bins = np.logspace(np.log10(min_s), np.log10(max_s), num=25)
+    centers = np.sqrt(bins[:-1] * bins[1:])
     plt.figure(figsize=(8,5))
     for pid in sorted(runs_by_param.keys()):
-        runs = runs_by_param[pid]
-        agg = np.concatenate([np.array(r['fires_all']) for r in runs if len(r['fires_all']) > 0]) if any(len(r['fires_all'])>0 for r in runs) else np.array([])
+        agg = fires_by_pid[pid]
         if agg.size == 0:
             continue
-        hist, edges = np.histogram(agg, bins=bins, density=True)
-        centers = np.sqrt(edges[:-1] * edges[1:])
+        hist = density_hist(agg, bins)
         mask = hist > 0
         plt.loglog(centers[mask], hist[mask], marker='o', linestyle='-', label=f'param {pid}')
     plt.title('Fire-size distributions aggregated by param_id')
@@ -131,19 +147,17 @@ if all_fires_global.size > 0:
     print('Saved', outp)
 
 # Cluster-size distributions per param
-all_clusters_global = np.concatenate([np.concatenate([np.array(r['clusters_all']) for r in runs_by_param[pid] if len(r['clusters_all'])>0]) for pid in runs_by_param.keys() if any(len(r['clusters_all'])>0 for r in runs_by_param[pid])]) if any(any(len(r['clusters_all'])>0 for r in runs_by_param[pid]) for pid in runs_by_param.keys()) else np.array([])
 if all_clusters_global.size > 0:
     min_c = max(1, int(all_clusters_global.min()))
     max_c = int(all_clusters_global.max())
     bins = np.logspace(np.log10(min_c), np.log10(max_c), num=25)
+    centers = np.sqrt(bins[:-1] * bins[1:])
     plt.figure(figsize=(8,5))
     for pid in sorted(runs_by_param.keys()):
-        runs = runs_by_param[pid]
-        agg = np.concatenate([np.array(r['clusters_all']) for r in runs if len(r['clusters_all']) > 0]) if any(len(r['clusters_all'])>0 for r in runs) else np.array([])
+        agg = clusters_by_pid[pid]
         if agg.size == 0:
             continue
-        hist, edges = np.histogram(agg, bins=bins, density=True)
-        centers = np.sqrt(edges[:-1] * edges[1:])
+        hist = density_hist(agg, bins)
         mask = hist > 0
         plt.loglog(centers[mask], hist[mask], marker='o', linestyle='-', label=f'param {pid}')
     plt.title('Cluster-size distributions aggregated by param_id')
@@ -156,7 +170,8 @@ if all_clusters_global.size > 0:
     plt.close()
     print('Saved', outp)
 
-# Mean density time series per param
+# Mean density time series per param; one figure is reused for every param_id
+fig, ax = plt.subplots(figsize=(8,4))
 for pid in sorted(runs_by_param.keys()):
     runs = runs_by_param[pid]
     densities = [np.array(r['density_series'], dtype=float) for r in runs if len(r['density_series'])>0]
@@ -168,19 +183,19 @@ for pid in sorted(runs_by_param.keys()):
     mean_series = np.nanmean(stacked, axis=0)
     std_series = np.nanstd(stacked, axis=0)
     x = np.arange(mean_series.size)
-    plt.figure(figsize=(8,4))
+    ax.clear()
     for i, arr in enumerate(stacked):
-        plt.plot(np.arange(arr.size), arr, alpha=0.3, label=f'run {runs[i]["run_id"]}')
-    plt.plot(x, mean_series, color='k', linewidth=2, label='mean')
-    plt.fill_between(x, mean_series - std_series, mean_series + std_series, color='k', alpha=0.2, label='std')
-    plt.title(f'Mean tree density over time (param {pid})')
-    plt.xlabel('Step')
-    plt.ylabel('Mean tree density')
-    plt.legend()
-    plt.tight_layout()
+        ax.plot(np.arange(arr.size), arr, alpha=0.3, label=f'run {runs[i]["run_id"]}')
+    ax.plot(x, mean_series, color='k', linewidth=2, label='mean')
+    ax.fill_between(x, mean_series - std_series, mean_series + std_series, color='k', alpha=0.2, label='std')
+    ax.set_title(f'Mean tree density over time (param {pid})')
+    ax.set_xlabel('Step')
+    ax.set_ylabel('Mean tree density')
+    ax.legend()
+    fig.tight_layout()
     outp = plots_dir / f'density_param{pid}.png'
-    plt.savefig(outp)
-    plt.close()
+    fig.savefig(outp)
     print('Saved', outp)
+plt.close(fig)
 
 print('Analysis complete')
@@ -1,20 +1,16 @@
-import csv
 from pathlib import Path
-import re
 import sys
 
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scripts.parallel_sims import scan_perstep_files
+
 # Usage: python scripts/fix_summary_perstep.py <experiment_dir>
 
 def find_perstep_map(exp_dir: Path):
-    # pattern: perstep_param{param}_..._id{run}_timestamp.csv
-    pattern = re.compile(r'perstep_param(?P<param>\d+)_.*_id(?P<run>\d+)_')
     mapping = {}
-    for p in exp_dir.glob('perstep_*.csv'):
-        m = pattern.search(p.name)
-        if not m:
-            continue
-        pid = int(m.group('param'))
-        rid = int(m.group('run'))
+    for p, pid, rid in scan_perstep_files(exp_dir):
         mapping.setdefault((pid, rid), str(p))
     return mapping
 
@@ -30,29 +26,21 @@ def fix_summary(exp_dir: Path):
     perstep_map = find_perstep_map(exp_dir)
     print('Found perstep files for keys:', list(perstep_map.keys()))
 
-    rows = []
-    with open(summary_file, newline='') as fh:
-        reader = csv.DictReader(fh)
-        keys = reader.fieldnames
-        for row in reader:
-            try:
-                pid = int(row.get('param_id') or -1)
-                rid = int(row.get('run_id') or -1)
-            except Exception:
-                pid = -1; rid = -1
-            key = (pid, rid)
-            if not row.get('perstep_file') and key in perstep_map:
-                row['perstep_file'] = perstep_map[key]
-            rows.append(row)
+    # Read every column as text so untouched values are written back exactly as they were
+    df = pd.read_csv(summary_file, dtype=str, keep_default_na=False)
+    if 'perstep_file' not in df.columns:
+        df['perstep_file'] = ''
+    if perstep_map:
+        pid = pd.to_numeric(df['param_id'], errors='coerce').fillna(-1).astype(int)
+        rid = pd.to_numeric(df['run_id'], errors='coerce').fillna(-1).astype(int)
+        found = pd.Series(perstep_map).reindex(pd.MultiIndex.from_arrays([pid, rid]))
+        missing = (df['perstep_file'] == '') & found.notna().to_numpy()
+        df.loc[missing, 'perstep_file'] = found.to_numpy()[missing.to_numpy()]
 
     # write out backup and updated file
     backup = summary_file.with_suffix('.bak.csv')
     summary_file.rename(backup)
-    with open(summary_file, 'w', newline='') as fh:
-        writer = csv.DictWriter(fh, fieldnames=keys)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
+    df.to_csv(summary_file, index=False)
     print('Updated summary written to', summary_file, '(backup:', backup, ')')
 
 
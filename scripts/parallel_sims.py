@@ -10,18 +10,168 @@ This will run a small demo sweep. To customize, edit the PARAMS list or add CLI
 argument parsing.
 """
 import argparse
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import multiprocessing
 import csv
+import gzip
 import os
 from pathlib import Path
 from datetime import datetime
-import json
+from functools import partial
+from itertools import chain
+from operator import itemgetter
+import re
 import sys
-from pathlib import Path
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # minimal imports; import run_simulation inside worker to avoid pickling issues
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Summary row of one run, as sent back from the pool and written to the summary CSV
+RunResult = namedtuple('RunResult', 'L p f steps suppress param_id run_id num_fires mean_size max_size '
+                                    'remaining_trees raw_file perstep_file seed')
+
+_IO_POOL = None
+
+# Set SIM_DEBUG=0 to skip the debug JSON of successful runs (failed runs always write one).
+# It stays on by default: the RQ2 notebook discovers runs through these files.
+_DEBUG = os.environ.get('SIM_DEBUG', '1') != '0'
+
+# Set SIM_GZIP=1 to write the per-step and raw fires CSVs gzip-compressed (*.csv.gz). Off by
+# default, since some notebooks glob for plain *.csv files.
+_GZIP = os.environ.get('SIM_GZIP', '0') != '0'
+
+# Thread-pool sizes of BLAS, OpenMP and Numba in the worker processes. Each worker runs one
+# simulation on one core, so N workers must not start N x cores threads between them.
+WORKER_THREAD_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMBA_NUM_THREADS')
+
+# Boolean scratch for _count_trees, reused across the runs a worker process handles
+_MASK_SCRATCH = None
+
+PERSTEP_SCHEMA = pa.schema([
+    ('param_id', pa.dictionary(pa.int32(), pa.string())),
+    ('run_id', pa.dictionary(pa.int32(), pa.string())),
+    ('step', pa.int64()),
+    ('fires', pa.list_(pa.int64())),
+    ('clusters', pa.list_(pa.int64())),
+    ('density', pa.float64()),
+])
+
+
+# perstep_param{param_id}_..._id{run_id}_{timestamp}.csv, as written by worker
+PERSTEP_NAME = re.compile(r'perstep_param(?P<param>\d+)_.*_id(?P<run>\d+)_', re.ASCII)
+
+
+def scan_perstep_files(exp_dir):
+    """List the per-step CSVs in exp_dir in one directory pass.
+
+    Returns (path, param_id, run_id) tuples sorted by file name.
+    """
+    exp_dir = Path(exp_dir)
+    with os.scandir(exp_dir) as it:
+        names = sorted(e.name for e in it
+                       if e.name.startswith('perstep_param') and e.name.endswith(('.csv', '.csv.gz')))
+    found = []
+    for name in names:
+        m = PERSTEP_NAME.match(name)
+        if m:
+            found.append((exp_dir / name, int(m.group('param')), int(m.group('run'))))
+    return found
+
+
+def perstep_parquet_path(fp):
+    """Parquet sidecar of a per-step CSV (plain or gzipped)."""
+    fp = Path(fp)
+    return fp.with_name(fp.name.removesuffix('.gz')).with_suffix('.parquet')
+
+
+def _open_csv(path):
+    """Open a CSV for writing, gzip-compressed (fast level) when the name ends in .gz."""
+    if path.suffix == '.gz':
+        return gzip.open(path, 'wt', newline='', compresslevel=1)
+    return open(path, 'w', newline='')
+
+
+def _ragged(lists):
+    """Build a list<int64> column from per-step lists as one flat value array plus offsets."""
+    offsets = np.zeros(len(lists) + 1, dtype=np.int32)
+    np.cumsum([len(x) for x in lists], out=offsets[1:])
+    values = np.fromiter(chain.from_iterable(lists), dtype=np.int64, count=int(offsets[-1]))
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(values))
+
+
+def save_perstep_parquet(path, records, param_id='', run_id=''):
+    """Write per-step records to a Parquet file next to the per-step CSV.
+
+    Same content as the CSV, but the fire and cluster lists are stored as list
+    columns, so loading them needs no text or JSON parsing.
+    """
+    n = len(records)
+    table = pa.table({
+        'param_id': pa.DictionaryArray.from_arrays(np.zeros(n, dtype=np.int32), [str(param_id)]),
+        'run_id': pa.DictionaryArray.from_arrays(np.zeros(n, dtype=np.int32), [str(run_id)]),
+        'step': [rec.get('step') for rec in records],
+        'fires': _ragged([rec.get('fires', ()) for rec in records]),
+        'clusters': _ragged([rec.get('cluster_sizes', ()) for rec in records]),
+        'density': [rec.get('mean_density_before') for rec in records],
+    }, schema=PERSTEP_SCHEMA)
+    pq.write_table(table, path)
+
+
+def _count_trees(grid):
+    """Number of tree cells (state 1) in grid, without allocating a fresh mask per run."""
+    global _MASK_SCRATCH
+    if _MASK_SCRATCH is None or _MASK_SCRATCH.shape != grid.shape:
+        _MASK_SCRATCH = np.empty(grid.shape, dtype=bool)
+    np.equal(grid, 1, out=_MASK_SCRATCH)
+    return int(np.count_nonzero(_MASK_SCRATCH))
+
+
+def _get_io_pool():
+    """Per-process thread pool that writes a run's output files concurrently."""
+    global _IO_POOL
+    if _IO_POOL is None:
+        _IO_POOL = ThreadPoolExecutor(max_workers=3)
+    return _IO_POOL
+
+
+def _write_perstep_csv(path, records):
+    """Write per-step records to CSV, one row per step with the lists as JSON strings."""
+    with _open_csv(path) as fh:
+        writer = csv.writer(fh)
+        # header must exactly match the requested format
+        writer.writerow(['step', 'fire_size', 'cluster distr', 'mean tree density'])
+        # serialize lists as JSON strings for safety and easy parsing
+        get = itemgetter('step', 'fires', 'cluster_sizes', 'mean_density_before')
+        dumps, opt = orjson.dumps, orjson.OPT_SERIALIZE_NUMPY
+        writer.writerows(
+            [step, dumps(fires, option=opt).decode(), dumps(clusters, option=opt).decode(), density]
+            for step, fires, clusters, density in map(get, records)
+        )
+
+
+def _write_raw_csv(path, fires_arr):
+    """Write the raw fire sizes, one per line under a fire_size header."""
+    with _open_csv(path) as fh:
+        np.savetxt(fh, fires_arr, fmt='%d', header='fire_size', comments='')
+
+
+def _write_debug(path, debug_info):
+    """Write the worker's debug JSON; a failed debug write never fails the run."""
+    try:
+        path.write_bytes(orjson.dumps(debug_info, option=orjson.OPT_INDENT_2))
+    except Exception:
+        pass
+
+
 def worker(outdir, params):
     """Run one simulation for a given parameter set.
 
@@ -38,13 +188,12 @@ def worker(outdir, params):
         pass
 
     # Ensure the project root is on sys.path so child processes can import src
-    project_root = Path(__file__).resolve().parent.parent
-    if str(project_root) not in sys.path:
-        sys.path.insert(0, str(project_root))
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
 
     # Import inside worker to ensure child processes can import the module
     from simulations.drosselschwab import simulate_drosselschwab_record
-    import numpy as _np
+    from simulations.seeding import run_rng
 
     # Coerce parameters with safe defaults
     L = int(params.get('L', 64))
@@ -59,30 +208,39 @@ def worker(outdir, params):
         suppress = int(params.get('suppress', 0))
     except Exception:
         suppress = 0
+    # Sweeps that only need fire sizes can skip the per-step cluster sizing (or thin it out)
+    record_clusters = str(params.get('record_clusters', True)).lower() not in ('0', 'false', 'no')
+    cluster_every = max(1, int(params.get('cluster_every', 1)))
+
+    # Every run draws from its own generator, derived from the sweep's base seed and its ids
+    # (so forked workers never share a random stream and the run can be reproduced)
+    rng, seed = run_rng(params)
 
     # Run the record-enabled simulation, guarded to capture exceptions
     timestamp = datetime.now().strftime('%Y%m%dT%H%M%SZ')
+    debug_path = outdir / f"debug_param{param_id}_id{run_id}_{timestamp}.json"
     debug_info = {
-        'params': {k: params.get(k) for k in ('L', 'p', 'f', 'steps', 'param_id', 'run_id', 'suppress', 'connectivity')},
+        'params': {k: params.get(k) for k in ('L', 'p', 'f', 'steps', 'param_id', 'run_id', 'suppress', 'connectivity',
+                                              'record_clusters', 'cluster_every')},
+        'seed': seed,
         'started_at': timestamp,
     }
 
     try:
         fires, grid, records = simulate_drosselschwab_record(
-            L=L, p=p, f=f, steps=steps, connectivity=connectivity, suppress=suppress
+            L=L, p=p, f=f, steps=steps, connectivity=connectivity, suppress=suppress,
+            record_clusters=record_clusters, cluster_every=cluster_every, rng=rng,
         )
         debug_info['records_returned'] = len(records) if records is not None else None
     except Exception as e:
         # Save debug file for diagnosis and re-raise so caller sees error
         debug_info['error'] = str(e)
-        debug_path = outdir / f"debug_param{param_id}_id{run_id}_{timestamp}.json"
-        try:
-            with open(debug_path, 'w') as fh:
-                json.dump(debug_info, fh, indent=2)
-        except Exception:
-            pass
+        _write_debug(debug_path, debug_info)
         raise
 
+    # Convert the fire sizes once; the summary and the raw file both work on the array
+    fires_arr = np.asarray(fires, dtype=np.int64)
+
     # Basic summary
     summary = {
         'L': L,
@@ -92,75 +250,118 @@ def worker(outdir, params):
         'suppress': suppress,
         'param_id': param_id,
         'run_id': run_id,
-        'num_fires': len(fires),
-        'mean_size': float(_np.mean(fires)) if fires else 0.0,
-        'max_size': int(_np.max(fires)) if fires else 0,
-        'remaining_trees': int(_np.sum(grid == 1)),
+        'num_fires': fires_arr.size,
+        'mean_size': float(fires_arr.mean()) if fires_arr.size else 0.0,
+        'max_size': int(fires_arr.max()) if fires_arr.size else 0,
+        'remaining_trees': _count_trees(grid),
+        'seed': seed,
     }
 
-    # Save debug info including number of records
+    # Debug info including number of records; written at most once, after all outputs are saved
     debug_info['finished_at'] = datetime.now().strftime('%Y%m%dT%H%M%SZ')
     debug_info['summary'] = {k: summary[k] for k in ('num_fires', 'mean_size', 'max_size', 'remaining_trees')}
-    debug_path = outdir / f"debug_param{param_id}_id{run_id}_{timestamp}.json"
-    try:
-        with open(debug_path, 'w') as fh:
-            json.dump(debug_info, fh, indent=2)
-    except Exception:
-        # don't fail the run on debug write errors
-        pass
 
-    # Save per-step records to CSV (requested format)
+    # Per-step CSV, its Parquet copy and the raw fires file are written concurrently on the
+    # process's I/O threads (pyarrow and numpy release the GIL while encoding and writing)
     perstep_fname = outdir / f"perstep_param{param_id}_L{L}_p{p}_f{f}_steps{steps}_id{run_id}_{timestamp}.csv"
+    raw_fname = outdir / f"fires_param{param_id}_L{L}_p{p}_f{f}_steps{steps}_id{run_id}_{timestamp}.csv"
+    if _GZIP:
+        perstep_fname = perstep_fname.with_name(perstep_fname.name + '.gz')
+        raw_fname = raw_fname.with_name(raw_fname.name + '.gz')
+    # If records is empty or None, write explicit empty rows for each step so downstream
+    # loaders see consistent length
+    if not records:
+        records = [{'step': i, 'fires': [], 'cluster_sizes': [], 'mean_density_before': None} for i in range(steps)]
+    io_pool = _get_io_pool()
+    perstep_writes = [
+        io_pool.submit(_write_perstep_csv, perstep_fname, records),
+        # columnar copy for fast loading; the CSV stays the canonical format
+        io_pool.submit(save_perstep_parquet, perstep_parquet_path(perstep_fname), records, param_id, run_id),
+    ]
+    # Also save aggregated raw fire sizes (legacy behavior)
+    raw_write = io_pool.submit(_write_raw_csv, raw_fname, fires_arr)
+
     try:
-        with open(perstep_fname, 'w', newline='') as fh:
-            writer = csv.writer(fh)
-            # header must exactly match the requested format
-            writer.writerow(['step', 'fire_size', 'cluster distr', 'mean tree density'])
-            # If records is empty or None, write explicit empty rows for each step for clarity
-            if not records:
-                # write empty entries so downstream loaders see consistent length
-                for i in range(steps):
-                    writer.writerow([i, json.dumps([]), json.dumps([]), None])
-            else:
-                for rec in records:
-                    # serialize lists as JSON strings for safety and easy parsing
-                    writer.writerow([
-                        rec.get('step'),
-                        json.dumps(rec.get('fires', [])),
-                        json.dumps(rec.get('cluster_sizes', [])),
-                        rec.get('mean_density_before'),
-                    ])
+        for fut in perstep_writes:
+            fut.result()
         summary['perstep_file'] = str(perstep_fname)
     except Exception as e:
         import traceback
-        tb = traceback.format_exc()
+        tb = ''.join(traceback.format_exception(e))
         summary['perstep_file'] = None
         summary['perstep_save_error'] = str(e)
-        # write the traceback into the debug json for easier diagnosis
-        try:
-            debug_info['perstep_save_error'] = str(e)
-            debug_info['perstep_save_traceback'] = tb
-            with open(outdir / f"debug_param{param_id}_id{run_id}_{timestamp}.json", 'w') as fh:
-                json.dump(debug_info, fh, indent=2)
-        except Exception:
-            pass
+        # record the traceback in the debug json for easier diagnosis
+        debug_info['perstep_save_error'] = str(e)
+        debug_info['perstep_save_traceback'] = tb
 
-    # Also save aggregated raw fire sizes (legacy behavior)
-    raw_fname = outdir / f"fires_param{param_id}_L{L}_p{p}_f{f}_steps{steps}_id{run_id}_{timestamp}.csv"
     try:
-        with open(raw_fname, 'w', newline='') as fh:
-            writer = csv.writer(fh)
-            writer.writerow(['fire_size'])
-            for s in fires:
-                writer.writerow([int(s)])
+        raw_write.result()
         summary['raw_file'] = str(raw_fname)
     except Exception as e:
         summary['raw_file'] = None
         summary['save_error'] = str(e)
 
+    # Successful runs skip the debug file when SIM_DEBUG=0; failed saves always write it
+    if _DEBUG or 'perstep_save_error' in debug_info:
+        _write_debug(debug_path, debug_info)
     return summary
 
 
+def _warm_up():
+    """Pool initializer: import the simulation modules (and their compiled kernels) ahead of the first task."""
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    import numpy  # noqa: F401
+    import simulations.drosselschwab  # noqa: F401
+
+
+@contextmanager
+def single_threaded_workers():
+    """Set WORKER_THREAD_VARS to 1 while worker processes are started, then restore them.
+
+    The workers (and the forkserver) take the environment they are started with, so the
+    parent's own settings are only changed for the duration of the block.
+    """
+    saved = {k: os.environ.get(k) for k in WORKER_THREAD_VARS}
+    os.environ.update(dict.fromkeys(WORKER_THREAD_VARS, '1'))
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def mp_context():
+    """Multiprocessing context for the sweep workers.
+
+    Workers are forked from a server process that has already imported the simulation
+    stack, instead of each starting a fresh interpreter (spawn) or copying this one (fork)
+    with its thread pools and locks.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    ctx = multiprocessing.get_context('forkserver')
+    ctx.set_forkserver_preload(['numpy', 'pyarrow', 'simulations.drosselschwab'])
+    return ctx
+
+
+def _worker_pair(outdir, params):
+    """Run worker(outdir, params) in a pool process.
+
+    Returns (None, RunResult, None) on success and (params, None, error) on failure,
+    so a successful task only sends a compact tuple back to the parent.
+    """
+    try:
+        res = worker(outdir, params)
+    except Exception as e:
+        return params, None, e
+    return None, RunResult(*(res.get(k, '') for k in RunResult._fields)), None
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -179,6 +380,8 @@ def main():
                         help="Number of runs per (p,f) parameter set")
     parser.add_argument("--processes", type=int, default=None,
                         help="Number of parallel processes (default: cpu count)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Base seed of the sweep (default: fresh entropy, printed and saved)")
     parser.add_argument(
     "--name",
     type=str,
@@ -189,8 +392,7 @@ def main():
     args = parser.parse_args()
 
     # Create experiments root under project/data/f_over_p and pick the next available experiment index
-    project_root = Path(__file__).resolve().parent.parent
-    base_dir = (project_root / "data" / args.name)
+    base_dir = (PROJECT_ROOT / "data" / args.name)
     base_dir.mkdir(parents=True, exist_ok=True)
 
     # Find lowest available experiment index starting from 1
@@ -207,6 +409,11 @@ def main():
     p_values = args.p
     f_values = args.f
     replicates = args.replicates
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    from simulations.seeding import fresh_seed
+    seed = fresh_seed() if args.seed is None else args.seed
+    print(f"Base seed: {seed}")
 
     param_list = []
     run_idx = 0
@@ -223,33 +430,45 @@ def main():
                     "p": p,
                     "f": f,
                     "steps": steps,
+                    "seed": seed,
                 })
 
     # Allow overriding number of workers via environment variable (or use CPU count)
     max_workers = int(os.environ.get('MAX_WORKERS', multiprocessing.cpu_count()))
     print(f"Running {len(param_list)} simulations with up to {max_workers} workers...")
 
+    # Longest jobs first (cost ~ L^2 * steps), so the short ones fill in the tail of the sweep
+    param_list.sort(key=lambda d: -(int(d.get('L', 64)) ** 2 * int(d.get('steps', 500))))
+
+    # Importing the simulation compiles its Numba kernels into the on-disk cache once here,
+    # so the workers load them from there instead of each compiling its own copy
+    _warm_up()
     results = []
-    with ProcessPoolExecutor(max_workers=max_workers) as exe:
-        # worker now expects (outdir, params) as its arguments
-        futures = {exe.submit(worker, outdir, params): params for params in param_list}
-        for fut in as_completed(futures):
-            params = futures[fut]
-            try:
-                res = fut.result()
-                print(f"Done: p={res['p']}, f={res['f']}, suppress = {res['suppress']}, fires={res['num_fires']}, mean={res['mean_size']:.2f}, max={res['max_size']}")
-                results.append(res)
-            except Exception as e:
-                print(f"Error for params {params}: {e}")
+    with single_threaded_workers():
+        pool = mp_context().Pool(max_workers, initializer=_warm_up)
+    # Tasks are handed out in chunks and collected in completion order; outdir is bound into
+    # the task function, so it is pickled once per chunk and each task only carries its params
+    chunksize = max(1, len(param_list) // (max_workers * 4))
+    run = partial(_worker_pair, str(outdir))
+    try:
+        for params, res, err in pool.imap_unordered(run, param_list, chunksize=chunksize):
+            if err is not None:
+                print(f"Error for params {params}: {err}")
+                continue
+            print(f"Done: p={res.p}, f={res.f}, suppress = {res.suppress}, fires={res.num_fires}, mean={res.mean_size:.2f}, max={res.max_size}")
+            results.append(res)
+    except BaseException:
+        # Interrupted or failed: do not wait for the runs still in flight
+        pool.terminate()
+        raise
+    finally:
+        # Shut the workers down here rather than leaving them to the interpreter-exit finalizers
+        pool.close()
+        pool.join()
 
     # Write a summary CSV
     summary_file = outdir / f"summary_{datetime.now().strftime('%Y%m%dT%H%M%SZ')}.csv"
-    keys = ['L', 'p', 'f', 'steps', 'suppress', 'param_id', 'run_id', 'num_fires', 'mean_size', 'max_size', 'remaining_trees', 'raw_file', 'perstep_file']
-    with open(summary_file, 'w', newline='') as fh:
-        writer = csv.DictWriter(fh, keys)
-        writer.writeheader()
-        for r in results:
-            writer.writerow({k: r.get(k, '') for k in keys})
+    pd.DataFrame.from_records(results, columns=RunResult._fields).to_csv(summary_file, index=False)
 
     print(f"Summary written to {summary_file}")
 
@@ -1,9 +1,9 @@
 import sys
 import os
 from pathlib import Path
-import csv
 import json
-import numpy as _np
+
+import numpy as np
 
 def worker2(outdir, params):
     # Pad fix
@@ -13,6 +13,7 @@ def worker2(outdir, params):
 
     
     from simulations.spatial import simulate_spatial_record
+    from simulations.seeding import run_rng
 
     # Parameters uitlezen
     L = int(params.get('L', 256))
@@ -24,12 +25,16 @@ def worker2(outdir, params):
     
     param_id = params.get('param_id', '')
     run_id = params.get('run_id', '')
+    outdir = Path(outdir)
+    # Eigen random stroom per run, uit de basis-seed van de sweep en de ids
+    rng, seed = run_rng(params)
 
     # Simulatie draaien
-    fires, grid, records = simulate_spatial_record(
+    fires, grid, records, _ = simulate_spatial_record(
         L=L, p=p, f=f, steps=steps, 
         oak_ratio=oak_ratio, 
-        p_burn_oak=p_burn_oak
+        p_burn_oak=p_burn_oak,
+        rng=rng,
     )
 
     # Resultaten opslaan (Summary)
@@ -39,18 +44,18 @@ def worker2(outdir, params):
         'p_burn_oak': p_burn_oak,
         'param_id': param_id,
         'run_id': run_id,
+        'seed': seed,
         'num_fires': len(fires),
-        'mean_size': float(_np.mean(fires)) if fires else 0.0,
-        'max_size': int(_np.max(fires)) if fires else 0,
+        'mean_size': float(fires.mean()) if fires.size else 0.0,
+        'max_size': int(fires.max()) if fires.size else 0,
     }
 
     # Ruwe brand data opslaan (Nodig voor je plots!)
     raw_fname = outdir / f"fires_spatial_p{param_id}_r{run_id}.csv"
-    with open(raw_fname, 'w', newline='') as fh:
-        writer = csv.writer(fh)
-        writer.writerow(['fire_size'])
-        for s in fires:
-            writer.writerow([int(s)])
-    
-    summary['raw_file'] = str(raw_fname)
+    try:
+        np.savetxt(raw_fname, np.asarray(fires, dtype=np.int64), fmt='%d', header='fire_size', comments='')
+        summary['raw_file'] = str(raw_fname)
+    except Exception as e:
+        summary['raw_file'] = None
+        summary['save_error'] = str(e)
     return summary
\ No newline at end of file
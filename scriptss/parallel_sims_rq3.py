@@ -5,17 +5,18 @@ Adapated from parallel_sims.py to support oak_ratio and p_burn_oak.
 import argparse
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import multiprocessing
-import csv
+import io
 import os
 from pathlib import Path
 from datetime import datetime
-import json
 import sys
 
 # minimal imports; import run_simulation inside worker to avoid pickling issues
 
 def worker(outdir, params):
     """Run one INHOMOGENEOUS simulation for a given parameter set.
+
+    outdir may be a str or a Path; a str is the cheaper of the two to send to a pool process.
     """
     # Ensure the project root is on sys.path so child processes can import src
     project_root = Path(__file__).resolve().parent.parent
@@ -37,6 +38,13 @@ def worker(outdir, params):
     
     oak_ratio = float(params.get('oak_ratio', 0.0))
     p_burn_oak = float(params.get('p_burn_oak', 0.3))
+    # Sweeps that only need fire sizes can skip the per-step cluster sizing (or thin it out)
+    record_clusters = str(params.get('record_clusters', True)).lower() not in ('0', 'false', 'no')
+    cluster_every = max(1, int(params.get('cluster_every', 1)))
+    outdir = Path(outdir)
+    # Own random stream per run, from the sweep's base seed (params 'seed', fresh if missing) and its ids
+    from simulations.seeding import run_rng
+    rng, seed = run_rng(params)
 
     
     fires, grid, records = simulate_inhomogeneous_record(
@@ -45,7 +53,10 @@ def worker(outdir, params):
         f=f, 
         steps=steps, 
         oak_ratio=oak_ratio,       # New
-        p_burn_oak=p_burn_oak      # Nnew
+        p_burn_oak=p_burn_oak,     # Nnew
+        record_clusters=record_clusters,
+        cluster_every=cluster_every,
+        rng=rng,
     )
 
     # Basic summary
@@ -59,9 +70,10 @@ def worker(outdir, params):
         'param_id': param_id,
         'run_id': run_id,
         'num_fires': len(fires),
-        'mean_size': float(_np.mean(fires)) if fires else 0.0,
-        'max_size': int(_np.max(fires)) if fires else 0,
+        'mean_size': float(fires.mean()) if fires.size else 0.0,
+        'max_size': int(fires.max()) if fires.size else 0,
         'remaining_trees': int(_np.sum(grid > 0)), # Let op: >0 want 1=Den en 2=Eik
+        'seed': seed,
     }
 
     # Save per-step records to CSV
@@ -70,17 +82,14 @@ def worker(outdir, params):
     perstep_fname = outdir / f"perstep_param{param_id}_oak{oak_ratio}_id{run_id}_{timestamp}.csv"
     
     try:
-        with open(perstep_fname, 'w', newline='') as fh:
-            writer = csv.writer(fh)
-            # header
-            writer.writerow(['step', 'fire_size', 'cluster distr', 'mean tree density'])
-            for rec in records:
-                writer.writerow([
-                    rec['step'],
-                    json.dumps(rec['fires']),
-                    json.dumps(rec['cluster_sizes']),
-                    rec['mean_density_before'],
-                ])
+        # The lists only hold ints, so they are formatted directly instead of going through csv and json
+        buf = io.StringIO()
+        buf.write('step,fire_size,cluster distr,mean tree density\n')
+        for rec in records:
+            fires_cell = ','.join(map(str, rec['fires']))
+            clusters_cell = ','.join(map(str, rec['cluster_sizes']))
+            buf.write(f'{rec["step"]},"[{fires_cell}]","[{clusters_cell}]",{rec["mean_density_before"]}\n')
+        perstep_fname.write_text(buf.getvalue())
         summary['perstep_file'] = str(perstep_fname)
     except Exception as e:
         summary['perstep_file'] = None
@@ -89,11 +98,7 @@ def worker(outdir, params):
     # Also save aggregated raw fire sizes
     raw_fname = outdir / f"fires_param{param_id}_oak{oak_ratio}_id{run_id}_{timestamp}.csv"
     try:
-        with open(raw_fname, 'w', newline='') as fh:
-            writer = csv.writer(fh)
-            writer.writerow(['fire_size'])
-            for s in fires:
-                writer.writerow([int(s)])
+        _np.savetxt(raw_fname, fires, fmt='%d', header='fire_size', comments='')
         summary['raw_file'] = str(raw_fname)
     except Exception as e:
         summary['raw_file'] = None
@@ -109,8 +114,9 @@ def worker2(outdir, params):
         sys.path.insert(0, str(project_root))
 
     # --- HIER IS HET VERSCHIL: Importeer de SPATIAL simulatie ---
-    import numpy as _np
     from simulations.spatial import simulate_spatial_record
+    from simulations.seeding import run_rng
+    import numpy as _np
 
     # Parameters uitlezen
     L = int(params.get('L', 256))
@@ -122,12 +128,16 @@ def worker2(outdir, params):
     
     param_id = params.get('param_id', '')
     run_id = params.get('run_id', '')
+    outdir = Path(outdir)
+    # Eigen random stroom per run, uit de basis-seed van de sweep en de ids
+    rng, seed = run_rng(params)
 
     # Simulatie draaien
     fires, grid, records, _ = simulate_spatial_record(
         L=L, p=p, f=f, steps=steps, 
         oak_ratio=oak_ratio, 
-        p_burn_oak=p_burn_oak
+        p_burn_oak=p_burn_oak,
+        rng=rng,
     )
 
     # Resultaten opslaan (Summary)
@@ -137,20 +147,20 @@ def worker2(outdir, params):
         'p_burn_oak': p_burn_oak,
         'param_id': param_id,
         'run_id': run_id,
+        'seed': seed,
         'num_fires': len(fires),
-        'mean_size': float(_np.mean(fires)) if fires else 0.0,
-        'max_size': int(_np.max(fires)) if fires else 0,
+        'mean_size': float(fires.mean()) if fires.size else 0.0,
+        'max_size': int(fires.max()) if fires.size else 0,
     }
 
     # Ruwe brand data opslaan (Nodig voor je plots!)
     raw_fname = outdir / f"fires_spatial_p{param_id}_r{run_id}.csv"
-    with open(raw_fname, 'w', newline='') as fh:
-        writer = csv.writer(fh)
-        writer.writerow(['fire_size'])
-        for s in fires:
-            writer.writerow([int(s)])
-    
-    summary['raw_file'] = str(raw_fname)
+    try:
+        _np.savetxt(raw_fname, fires, fmt='%d', header='fire_size', comments='')
+        summary['raw_file'] = str(raw_fname)
+    except Exception as e:
+        summary['raw_file'] = None
+        summary['save_error'] = str(e)
     return summary
 
 def main():
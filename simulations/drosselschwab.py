@@ -1,112 +1,110 @@
 import numpy as np
+from scipy.ndimage import label
 
-from src.drosselschwab import step, burn_step
+from src.drosselschwab import FireBuf, step, burn_step
 
 
-def _compute_cluster_sizes(grid, connectivity=4):
-    """Compute sizes of connected tree clusters (value==1) in grid without modifying it.
-    Uses iterative flood-fill (stack/DFS) and returns a list of cluster sizes.
+# Neighbourhoods for scipy.ndimage.label
+_STRUCTURE = {
+    4: np.array([[0, 1, 0], [1, 1, 1], [0, 1, 0]]),
+    8: np.ones((3, 3), dtype=int),
+}
+
+
+def _compute_cluster_sizes(tree_mask, labels, connectivity=4):
+    """Compute sizes of connected tree clusters in a boolean tree mask.
+
+    labels is an int32 buffer of the mask's shape that receives the cluster labels.
+    Returns an int array of the cluster sizes, in row-major order of their first cell.
     """
-    Lx, Ly = grid.shape
-    visited = np.zeros_like(grid, dtype=bool)
-    clusters = []
+    n = label(tree_mask, structure=_STRUCTURE[connectivity], output=labels)
+    return np.bincount(labels.ravel(), minlength=n + 1)[1:]
 
-    if np.count_nonzero(grid == 1) == 0:
-        return clusters
 
-    # neighbor offsets
-    if connectivity == 8:
-        neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-    else:
-        neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-    for i in range(Lx):
-        for j in range(Ly):
-            if grid[i, j] == 1 and not visited[i, j]:
-                # start new cluster
-                size = 0
-                stack = [(i, j)]
-                visited[i, j] = True
-                while stack:
-                    cx, cy = stack.pop()
-                    size += 1
-                    for dx, dy in neighbors:
-                        nx, ny = cx + dx, cy + dy
-                        if 0 <= nx < Lx and 0 <= ny < Ly and not visited[nx, ny] and grid[nx, ny] == 1:
-                            visited[nx, ny] = True
-                            stack.append((nx, ny))
-                clusters.append(size)
-
-    return clusters
-
-
-def simulate_drosselschwab_record(L=10, p=0.05, f=0.001, steps=500, connectivity=4, suppress=0):
+def simulate_drosselschwab_record(L=10, p=0.05, f=0.001, steps=500, connectivity=4, suppress=0,
+                                  record_clusters=True, cluster_every=1, rng=None):
     """Run simulation and return aggregated fires + final grid + per-step records.
 
-    Returns (fire_sizes, grid, records) where records is a list of dicts per step:
+    Returns (fire_sizes, grid, records) where fire_sizes is an int32 array and records is a list of dicts per step:
     {'step': i, 'fires': [s1,s2,...], 'cluster_sizes': [c1,c2,...], 'mean_density_before': d}
+
+    Cluster sizes are only computed every cluster_every steps, and not at all with
+    record_clusters=False; the other steps record an empty list.
+
+    All randomness is drawn from rng, a np.random.Generator (a fresh one if None),
+    so a seeded generator reproduces the run.
     """
-    grid = np.zeros((L, L), dtype=np.int8)
-    fire_sizes = []
+    rng = np.random.default_rng() if rng is None else rng
+    grid = np.zeros((L, L), dtype=np.uint8)
+    fire_sizes = FireBuf()
     records = []
+    # Label buffer for the per-step cluster sizing, and the buffer every full-grid roll is drawn into
+    labels = np.empty((L, L), dtype=np.int32)
+    roll = np.empty((L, L))
+    # Running count of trees (1); growth adds to it and every fire takes its size off
+    n_trees = 0
 
     for i in range(steps):
         # Growth phase occurs inside step(); but we need mean density BEFORE burning which is after growth
         # To capture that, we replicate the growth portion here and then perform lightning/burning similar to step()
         # 1. Growth Phase: Empty sites become trees with probability p
-        empty_mask = (grid == 0)
-        growth_roll = np.random.random(np.count_nonzero(empty_mask))
-        grid[empty_mask] = np.array(growth_roll < p, dtype=np.int8)
+        growth_mask = (grid == 0)
+        growth_mask &= rng.random(out=roll) < p
+        grid[growth_mask] = 1
+        n_trees += int(np.count_nonzero(growth_mask))
 
         # mean tree density before lightning/burning
-        mean_density_before = float(np.mean(grid == 1))
+        mean_density_before = n_trees / (L * L)
 
         # 2. Lightning Phase: Trees are struck with probability f
-        tree_indices = np.argwhere(grid == 1)
+        strike_mask = (grid == 1)
+        strike_mask &= rng.random(out=roll) < f
+        strikes = np.argwhere(strike_mask)
         step_fires = []
-        if len(tree_indices) > 0:
-            lightning_roll = np.random.random(len(tree_indices))
-            strikes = tree_indices[lightning_roll < f]
-
-            # 3. Burning Phase: Burn the whole connected cluster
-            for start_pos in strikes:
-                if grid[start_pos[0], start_pos[1]] == 1:
-                    # cast to plain int to avoid numpy scalar serialization issues
-                    size = int(burn_step(grid, start_pos[0], start_pos[1], L, connectivity=connectivity, suppress=suppress))
-                    step_fires.append(size)
-                    fire_sizes.append(size)
 
-        # After burning, compute cluster sizes of remaining trees
-        cluster_sizes = _compute_cluster_sizes(grid, connectivity=connectivity)
+        # 3. Burning Phase: Burn the whole connected cluster
+        for start_pos in strikes:
+            if grid[start_pos[0], start_pos[1]] == 1:
+                # cast to plain int to avoid numpy scalar serialization issues
+                size = int(burn_step(grid, start_pos[0], start_pos[1], L, connectivity=connectivity, suppress=suppress, rng=rng))
+                step_fires.append(size)
+                fire_sizes.append(size)
+                n_trees -= size
 
-        # ensure cluster sizes are plain ints for JSON/CSV serialization
-        cluster_sizes = [int(c) for c in cluster_sizes]
+        # After burning, compute cluster sizes of remaining trees
+        if record_clusters and i % cluster_every == 0:
+            # tolist() gives plain ints for JSON/CSV serialization
+            cluster_sizes = _compute_cluster_sizes(grid == 1, labels, connectivity).tolist()
+        else:
+            cluster_sizes = []
 
         records.append({
-            'step': int(i),
-            'fires': list(step_fires),
-            'cluster_sizes': list(cluster_sizes),
+            'step': i,
+            'fires': step_fires,
+            'cluster_sizes': cluster_sizes,
             'mean_density_before': mean_density_before,
         })
 
-    return fire_sizes, grid, records
+    return fire_sizes.array(), grid, records
 
 
 # keep existing API for backwards compatibility
 
-def simulate_drosselschwab(L=10, p=0.05, f=0.001, steps=500):
-    grid = np.zeros((L, L), dtype=np.int8)
-    fire_sizes = []
+def simulate_drosselschwab(L=10, p=0.05, f=0.001, steps=500, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    grid = np.zeros((L, L), dtype=np.uint8)
+    fire_sizes = FireBuf()
 
     for _ in range(steps):
-        step(grid, fire_sizes, L, p, f)
+        step(grid, fire_sizes, L, p, f, rng=rng)
 
-    return fire_sizes, grid
+    return fire_sizes.array(), grid
 
 
 def simulate_drosselschwab_steps(
     L=10, p=0.05, f=0.001, steps=500, suppress=0, advanced_state=False,
-    initial_grid=None, initial_fire_sizes=None, start_step=0,
+    initial_grid=None, initial_fire_sizes=None, start_step=0, snapshot=True, snapshot_every=1,
+    rng=None,
 ):
     """Yield (grid, fire_sizes, step_index) after each simulation step for live UI updates.
 
@@ -114,18 +112,33 @@ def simulate_drosselschwab_steps(
     on each lightning strike (one entry per fire = cluster size). It therefore
     grows across steps. Each yield returns a snapshot list(fire_sizes).
 
+    With snapshot=False the live grid and fire_sizes list are yielded instead of
+    copies; they are only valid until the generator is advanced again, so the
+    caller must copy whatever it keeps.
+
+    With snapshot_every=K only every K-th step (and the last one) is yielded, so
+    the steps in between pay for no copies at all.
+
     If initial_grid and initial_fire_sizes are provided, continue from that state
     for steps start_step+1 .. steps (start_step is the step index already reached).
+
+    rng is the np.random.Generator for every step (a fresh one if None).
     """
+    rng = np.random.default_rng() if rng is None else rng
     if initial_grid is not None and initial_fire_sizes is not None:
-        grid = np.array(initial_grid, dtype=np.int8, copy=True)
+        grid = np.array(initial_grid, dtype=np.uint8, copy=True)
         fire_sizes = list(initial_fire_sizes)
         step_range = range(start_step, steps)
     else:
-        grid = np.zeros((L, L), dtype=np.int8)
+        grid = np.zeros((L, L), dtype=np.uint8)
         fire_sizes = []
         step_range = range(steps)
 
     for i in step_range:
-        step(grid, fire_sizes, L, p, f, suppress=suppress, advanced_state=advanced_state)
-        yield np.copy(grid), list(fire_sizes), i + 1
+        step(grid, fire_sizes, L, p, f, suppress=suppress, advanced_state=advanced_state, rng=rng)
+        if (i + 1) % snapshot_every and i + 1 != steps:
+            continue
+        if snapshot:
+            yield np.copy(grid), list(fire_sizes), i + 1
+        else:
+            yield grid, fire_sizes, i + 1
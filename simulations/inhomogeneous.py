@@ -1,111 +1,80 @@
 import numpy as np
 from src.rq3 import burn_step_inhomogeneous, step_inhomogeneous 
+from simulations.drosselschwab import _compute_cluster_sizes
+from src.drosselschwab import FireBuf
 
 
-
-def _compute_cluster_sizes(grid, connectivity=4):
-    Lx, Ly = grid.shape
-    visited = np.zeros_like(grid, dtype=bool)
-    clusters = []
-
-    if np.count_nonzero(grid > 0) == 0: # Let op: > 0 want 1=Den, 2=Eik
-        return clusters
-
-    # neighbor offsets
-    if connectivity == 8:
-        neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-    else:
-        neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-    for i in range(Lx):
-        for j in range(Ly):
-            # We kijken of er een boom staat (grid > 0)
-            if grid[i, j] > 0 and not visited[i, j]:
-                size = 0
-                stack = [(i, j)]
-                visited[i, j] = True
-                while stack:
-                    cx, cy = stack.pop()
-                    size += 1
-                    for dx, dy in neighbors:
-                        nx, ny = cx + dx, cy + dy
-                        # Check of buurman ook een boom is (> 0)
-                        if 0 <= nx < Lx and 0 <= ny < Ly and not visited[nx, ny] and grid[nx, ny] > 0:
-                            visited[nx, ny] = True
-                            stack.append((nx, ny))
-                clusters.append(size)
-    return clusters
-
-
-def simulate_inhomogeneous_record(L=128, p=0.01, f=0.0001, steps=1000, oak_ratio=0.3, p_burn_oak=0.3):
+def simulate_inhomogeneous_record(L=128, p=0.01, f=0.0001, steps=1000, oak_ratio=0.3, p_burn_oak=0.3,
+                                  record_clusters=True, cluster_every=1, rng=None):
     """
     Run inhomogeneous forest fire simulation and return aggregated fires + final grid + per-step records.
+    Cluster sizes are only computed every cluster_every steps (never with record_clusters=False).
+    All randomness is drawn from rng, a np.random.Generator (a fresh one if None).
     """
+    rng = np.random.default_rng() if rng is None else rng
     
     # Constants
     EMPTY = 0
     PINE = 1
     OAK = 2
 
-    grid = np.zeros((L, L), dtype=np.int8)
-    fire_sizes = [] # Total overview of all fires
+    grid = np.zeros((L, L), dtype=np.uint8)
+    fire_sizes = FireBuf() # Total overview of all fires
     records = []    # Per-step records
+    # Label buffer for the per-step cluster sizing and the buffer the full-grid rolls are drawn into
+    labels = np.empty((L, L), dtype=np.int32)
+    roll = np.empty((L, L))
+    # Running count of pines and oaks; growth adds to it and every fire takes its size off
+    n_trees = 0
 
     for i in range(steps):
         
-        empty_mask = (grid == EMPTY)
-        num_empty = np.count_nonzero(empty_mask)
-        
-        if num_empty > 0:
-            growth_roll = np.random.random(num_empty)
-            new_tree_indices = np.where(growth_roll < p)[0]
-            
-                
-            new_values = np.full(len(new_tree_indices), PINE, dtype=np.int8)
-            type_roll = np.random.random(len(new_tree_indices))
-            new_values[type_roll < oak_ratio] = OAK
-            
-                
-            flat_indices = np.flatnonzero(empty_mask)
-            grid.ravel()[flat_indices[new_tree_indices]] = new_values
+        # Empty sites grow a tree with probability p; each new tree is an oak with probability oak_ratio
+        growth_mask = (grid == EMPTY)
+        growth_mask &= rng.random(out=roll) < p
+        is_oak = rng.random(out=roll) < oak_ratio
+        new_trees = np.where(is_oak[growth_mask], OAK, PINE)
+        grid[growth_mask] = new_trees
+        n_trees += new_trees.size
 
-        
-        mean_density_before = float(np.mean(grid > 0))
+        mean_density_before = n_trees / (L * L)
 
        
-        tree_indices = np.argwhere(grid > 0) # Alles wat boom is
+        strike_mask = (grid > 0) # Alles wat boom is
+        strike_mask &= rng.random(out=roll) < f
+        strikes = np.argwhere(strike_mask)
         step_fires = []
-        
-        if len(tree_indices) > 0:
-            lightning_roll = np.random.random(len(tree_indices))
-            strikes = tree_indices[lightning_roll < f]
 
-            
-            for start_pos in strikes:
-                if grid[start_pos[0], start_pos[1]] > 0:
-                    # Gebruik jouw NIEUWE inhomogene burn functie
-                    size = burn_step_inhomogeneous(
-                        grid, 
-                        start_pos[0], start_pos[1], 
-                        L, 
-                        p_burn_oak=p_burn_oak
-                    )
-                    step_fires.append(size)
-                    fire_sizes.append(size)
-
-        
-        current_clusters = _compute_cluster_sizes(grid)
+        for start_pos in strikes:
+            if grid[start_pos[0], start_pos[1]] > 0:
+                # Gebruik jouw NIEUWE inhomogene burn functie
+                size = burn_step_inhomogeneous(
+                    grid, 
+                    start_pos[0], start_pos[1], 
+                    L, 
+                    p_burn_oak=p_burn_oak,
+                    rng=rng,
+                )
+                step_fires.append(size)
+                fire_sizes.append(size)
+                n_trees -= size
+
+        if record_clusters and i % cluster_every == 0:
+            # Pines and oaks both count as trees
+            current_clusters = _compute_cluster_sizes(grid > 0, labels).tolist()
+        else:
+            current_clusters = []
 
         
         records.append({
             'step': i,
-            'fires': list(step_fires),
-            'cluster_sizes': list(current_clusters),
+            'fires': step_fires,
+            'cluster_sizes': current_clusters,
             'mean_density_before': mean_density_before,
             'oak_ratio': oak_ratio 
         })
 
-    return fire_sizes, grid, records
+    return fire_sizes.array(), grid, records
 
 
 def simulate_inhomogeneous_steps(
@@ -119,20 +88,35 @@ def simulate_inhomogeneous_steps(
     initial_grid=None,
     initial_fire_sizes=None,
     start_step=0,
+    snapshot=True,
+    snapshot_every=1,
+    rng=None,
 ):
-    """Yield (grid, fire_sizes, step_index) after each simulation step for live UI updates."""
+    """Yield (grid, fire_sizes, step_index) after each simulation step for live UI updates.
+
+    With snapshot=False the live grid and fire_sizes list are yielded instead of
+    copies; they are only valid until the generator is advanced again.
+    With snapshot_every=K only every K-th step (and the last one) is yielded.
+    rng is the np.random.Generator for every step (a fresh one if None).
+    """
+    rng = np.random.default_rng() if rng is None else rng
     if initial_grid is not None and initial_fire_sizes is not None:
-        grid = np.array(initial_grid, dtype=np.int8, copy=True)
+        grid = np.array(initial_grid, dtype=np.uint8, copy=True)
         fire_sizes = list(initial_fire_sizes)
         step_range = range(start_step, steps)
     else:
-        grid = np.zeros((L, L), dtype=np.int8)
+        grid = np.zeros((L, L), dtype=np.uint8)
         fire_sizes = []
         step_range = range(steps)
 
     for i in step_range:
         step_inhomogeneous(
             grid, fire_sizes, L, p, f,
-            oak_ratio=oak_ratio, p_burn_oak=p_burn_oak, advanced_state=advanced_state,
+            oak_ratio=oak_ratio, p_burn_oak=p_burn_oak, advanced_state=advanced_state, rng=rng,
         )
-        yield np.copy(grid), list(fire_sizes), i + 1
+        if (i + 1) % snapshot_every and i + 1 != steps:
+            continue
+        if snapshot:
+            yield np.copy(grid), list(fire_sizes), i + 1
+        else:
+            yield grid, fire_sizes, i + 1
@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def fresh_seed():
+    """A new base seed from OS entropy, kept to 63 bits so it fits the summary CSV and debug JSON."""
+    return int(np.random.SeedSequence().generate_state(1, np.uint64)[0] >> np.uint64(1))
+
+
+def run_rng(params):
+    """
+    Random generator of one run and the base seed it came from.
+
+    The stream is SeedSequence(seed, spawn_key=(param_id, run_id)): runs of one sweep get
+    independent streams, and a sweep with a fresh seed does not replay an earlier one. params
+    'seed' is the sweep's base seed (fresh entropy if missing); record it to reproduce the run.
+    """
+    seed = params.get('seed')
+    seed = fresh_seed() if seed in (None, '') else int(seed)
+    try:
+        spawn_key = (int(params.get('param_id')), int(params.get('run_id')))
+    except (TypeError, ValueError):
+        spawn_key = ()
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=spawn_key)), seed
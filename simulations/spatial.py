@@ -1,20 +1,22 @@
 import numpy as np
 from src.slimemold import generate_slime_mold_mask
+from src.drosselschwab import FireBuf
 from src.rq3 import step_inhomogeneous_spatial, _compute_cluster_sizes # hergebruik de cluster size functie
 
-def simulate_spatial_record(L=256, p=0.01, f=0.0001, steps=5000, oak_ratio=0.3, p_burn_oak=0.3):
-    
+def simulate_spatial_record(L=256, p=0.01, f=0.0001, steps=5000, oak_ratio=0.3, p_burn_oak=0.3, rng=None):
+    # Een generator voor het masker en alle stappen, zodat een geseede rng de hele run reproduceert
+    rng = np.random.default_rng() if rng is None else rng
 
-    oak_mask = generate_slime_mold_mask(L, oak_ratio)
+    oak_mask = generate_slime_mold_mask(L, oak_ratio, rng=rng)
     
     # B. Start Simulation
-    grid = np.zeros((L, L), dtype=np.int8)
-    fire_sizes = []
+    grid = np.zeros((L, L), dtype=np.uint8)
+    fire_sizes = FireBuf()
     records = []
 
     for i in range(steps):
         
-        step_inhomogeneous_spatial(grid, fire_sizes, L, p, f, oak_mask, p_burn_oak)
+        step_inhomogeneous_spatial(grid, fire_sizes, L, p, f, oak_mask, p_burn_oak, rng=rng)
         
 
         mean_density = float(np.mean(grid > 0))
@@ -23,8 +25,8 @@ def simulate_spatial_record(L=256, p=0.01, f=0.0001, steps=5000, oak_ratio=0.3,
         
         records.append({
             'step': i,
-            'fires': list(fire_sizes[-1:]) if fire_sizes else [], 
+            'fires': fire_sizes.array()[-1:].tolist(), 
             
         })
     
-    return fire_sizes, grid, records, oak_mask
\ No newline at end of file
+    return fire_sizes.array(), grid, records, oak_mask
\ No newline at end of file
@@ -1,10 +1,130 @@
 import numpy as np
 import random as rnd
+from numba import njit
 
-def burn_step(grid, x, y, L, connectivity=4, suppress=0, advanced_state=False):
+# Work arrays for the flood fill and step(), grown to the largest grid seen so far
+_SX = None
+_SY = None
+_FIRES = None
+
+
+def _ensure_buffers(L):
+    """Grow the work arrays to at least L*L entries and return (_SX, _SY, _FIRES).
+
+    src/rq3.py shares them too: _SX serves as its flood-fill stack.
+    """
+    global _SX, _SY, _FIRES
+    if _SX is None or _SX.size < L * L:
+        _SX = np.empty(L * L, dtype=np.int32)
+        _SY = np.empty(L * L, dtype=np.int32)
+        # At most one fire per tree in a step
+        _FIRES = np.empty(L * L, dtype=np.int32)
+    return _SX, _SY, _FIRES
+
+
+class FireBuf:
     """
-    Burn the entire connected cluster of trees containing (x, y) using an
-    iterative flood-fill (stack). Trees are represented by 1 and emptied to 0.
+    Growable int32 array of fire sizes, a drop-in for the fire_sizes list.
+
+    The buffer doubles when full, so append() and extend() are amortised O(1)
+    per fire; array() returns the filled part without copying.
+    """
+    __slots__ = ('data', 'n')
+
+    def __init__(self, capacity=1024):
+        self.data = np.empty(capacity, dtype=np.int32)
+        self.n = 0
+
+    def _reserve(self, extra):
+        if self.n + extra > self.data.size:
+            grown = np.empty(max(self.n + extra, 2 * self.data.size), dtype=np.int32)
+            grown[:self.n] = self.data[:self.n]
+            self.data = grown
+
+    def append(self, size):
+        if self.n == self.data.size:
+            self._reserve(1)
+        self.data[self.n] = size
+        self.n += 1
+
+    def extend(self, sizes):
+        sizes = np.asarray(sizes, dtype=np.int32)
+        self._reserve(sizes.size)
+        self.data[self.n:self.n + sizes.size] = sizes
+        self.n += sizes.size
+
+    def __len__(self):
+        return self.n
+
+    def array(self):
+        return self.data[:self.n]
+
+
+@njit(cache=True, boundscheck=False)
+def _burn_cluster4(grid, x, y, L, sx, sy):
+    """Set the 4-connected cluster of trees (1) at (x, y) on fire (2).
+
+    The burned cells are left in sx[:n], sy[:n]; returns n.
+    """
+    grid[x, y] = 2
+    sx[0] = x
+    sy[0] = y
+    n = 1
+    head = 0
+    # Cells are set on fire as they are queued, so each enters the arrays once
+    while head < n:
+        cx = sx[head]
+        cy = sy[head]
+        head += 1
+        if cx + 1 < L and grid[cx + 1, cy] == 1:
+            grid[cx + 1, cy] = 2
+            sx[n] = cx + 1
+            sy[n] = cy
+            n += 1
+        if cx > 0 and grid[cx - 1, cy] == 1:
+            grid[cx - 1, cy] = 2
+            sx[n] = cx - 1
+            sy[n] = cy
+            n += 1
+        if cy + 1 < L and grid[cx, cy + 1] == 1:
+            grid[cx, cy + 1] = 2
+            sx[n] = cx
+            sy[n] = cy + 1
+            n += 1
+        if cy > 0 and grid[cx, cy - 1] == 1:
+            grid[cx, cy - 1] = 2
+            sx[n] = cx
+            sy[n] = cy - 1
+            n += 1
+    return n
+
+
+@njit(cache=True, boundscheck=False)
+def _burn_cluster8(grid, x, y, L, sx, sy):
+    """As _burn_cluster4, for the 8-connected (Moore) neighbourhood."""
+    grid[x, y] = 2
+    sx[0] = x
+    sy[0] = y
+    n = 1
+    head = 0
+    while head < n:
+        cx = sx[head]
+        cy = sy[head]
+        head += 1
+        for nx in range(max(cx - 1, 0), min(cx + 2, L)):
+            for ny in range(max(cy - 1, 0), min(cy + 2, L)):
+                if grid[nx, ny] == 1:
+                    grid[nx, ny] = 2
+                    sx[n] = nx
+                    sy[n] = ny
+                    n += 1
+    return n
+
+
+def burn_step(grid, x, y, L, connectivity=4, suppress=0, advanced_state=False, rng=None):
+    """
+    Burn the entire connected cluster of trees containing (x, y) using a
+    compiled flood-fill. Trees are represented by 1 and set on fire (2).
 
     Parameters
     - grid: 2D numpy array of ints (0 = empty, 1 = tree, 2 = fire, 3 = suppressed)
@@ -14,60 +134,104 @@ def burn_step(grid, x, y, L, connectivity=4, suppress=0, advanced_state=False):
     - suppress: number of trees to replant after burning
     - advanced_state: if True, use state 2 for fire and state 3 for suppressed trees
                       if False, fire cells are set to 2 but suppressed go to 1 (default)
+    - rng: np.random.Generator that picks the replanted trees (default: the random module)
 
     Returns the number of trees burned (cluster size). If (x,y) is not a tree
     the function returns 0.
     """
-
-    burnt_trees = set()
-
     # If the starting site is not a tree, nothing to burn
     if grid[x, y] != 1:
         return 0
 
-    # Choose neighbor offsets based on requested connectivity
+    _ensure_buffers(L)
+
     if connectivity == 8:
-        neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+        burned_size = _burn_cluster8(grid, x, y, L, _SX, _SY)
     else:
         # default: 4-neighbor (von Neumann)
-        neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-    burned_size = 0
-    stack = [(x, y)]
-
-    burnt_trees.add((x, y))
-
-    # Iterative flood-fill: pop positions from stack, inspect neighbors
-    while stack:
-        cx, cy = stack.pop()
-        # If this site is not a tree (might have been cleared by earlier pop), skip
-        if grid[cx, cy] != 1:
-            continue
-        # Burn this tree (set to fire state, cleared next step)
-        grid[cx, cy] = 2
-        burned_size += 1
-
-        # Check neighbors
-        for dx, dy in neighbors:
-            nx, ny = cx + dx, cy + dy
-            if 0 <= nx < L and 0 <= ny < L and grid[nx, ny] == 1:
-                # Mark for burning by pushing onto stack. We don't mark it here to 0
-                # to avoid double-counting until popped (but an early mark is fine too).
-                stack.append((nx, ny))
-                burnt_trees.add((nx, ny))
+        burned_size = _burn_cluster4(grid, x, y, L, _SX, _SY)
 
     # Suppression: replant some trees
-    num_replace = np.min([burned_size, suppress])
-    trees_to_replace = rnd.sample(list(burnt_trees), num_replace)
-
-    # Use state 3 (suppressed) if advanced_state, otherwise state 1 (tree)
-    replant_state = 3 if advanced_state else 1
-    for coords in trees_to_replace:
-        grid[coords[0], coords[1]] = replant_state
+    num_replace = min(burned_size, suppress)
+    if num_replace > 0:
+        if rng is None:
+            picks = rnd.sample(range(burned_size), num_replace)
+        else:
+            picks = rng.choice(burned_size, num_replace, replace=False)
+        # Use state 3 (suppressed) if advanced_state, otherwise state 1 (tree)
+        grid[_SX[picks], _SY[picks]] = 3 if advanced_state else 1
 
     return burned_size - num_replace
 
-def step(grid, fire_sizes, L, p, f, suppress=0, advanced_state=False):
+@njit(cache=True)
+def _gap(log_q, rng):
+    """Number of failures before the next success of a Bernoulli trial, log_q = log(1 - prob).
+
+    The uniform is drawn from rng, a np.random.Generator, so a seeded generator
+    reproduces the compiled run as well.
+
+    Drawing the gaps between successes takes one random number per success
+    instead of one per trial.
+    """
+    if log_q == 0.0:
+        return np.iinfo(np.int64).max
+    # Capped so that vanishingly small probabilities cannot overflow the cast
+    return int(min(np.log(1.0 - rng.random()) / log_q, 9e18))
+
+
+@njit(cache=True, boundscheck=False)
+def step_nb(grid, fire_buf, p, f, suppress, replant_state, sx, sy, rng):
+    """
+    Compiled body of step(): clear, grow, strike and burn, in place.
+
+    The sizes of this step's fires are written to fire_buf and their number is
+    returned. sx and sy are flood-fill work arrays of at least L*L entries;
+    every random number comes from rng, a np.random.Generator.
+    """
+    L = grid.shape[0]
+    log_p = np.log1p(-p) if p < 1.0 else -np.inf
+    log_f = np.log1p(-f) if f < 1.0 else -np.inf
+
+    # 0./1. Clear previous fires (fire -> empty, suppressed -> tree), then grow on empty sites
+    skip = _gap(log_p, rng)
+    for i in range(L):
+        for j in range(L):
+            v = grid[i, j]
+            if v == 2:
+                v = 0
+            elif v == 3:
+                v = 1
+            # Count without branching on the cell value; only a new tree takes a branch
+            skip -= v == 0
+            if skip < 0:
+                v = 1
+                skip = _gap(log_p, rng)
+            grid[i, j] = v
+
+    # 2./3. Lightning and burning: a struck tree burns its whole cluster at once,
+    # so trees later in the scan that burned already are no longer candidates
+    n_fires = 0
+    skip = _gap(log_f, rng)
+    for i in range(L):
+        for j in range(L):
+            skip -= grid[i, j] == 1
+            if skip >= 0:
+                continue
+            skip = _gap(log_f, rng)
+            burned = _burn_cluster4(grid, i, j, L, sx, sy)
+            # Suppression: replant a random sample of the burned trees (partial Fisher-Yates)
+            num_replace = min(burned, suppress)
+            for k in range(num_replace):
+                r = k + int(rng.random() * (burned - k))
+                sx[k], sx[r] = sx[r], sx[k]
+                sy[k], sy[r] = sy[r], sy[k]
+                grid[sx[k], sy[k]] = replant_state
+            fire_buf[n_fires] = burned - num_replace
+            n_fires += 1
+    return n_fires
+
+
+def step(grid, fire_sizes, L, p, f, suppress=0, advanced_state=False, rng=None):
     """
     Run a single step of the simulation.
 
@@ -80,26 +244,16 @@ def step(grid, fire_sizes, L, p, f, suppress=0, advanced_state=False):
     - suppress: number of trees to replant after burning (suppression)
     - advanced_state: if True, preserve fire (2) and suppressed (3) states for visualization
                       if False (default), only states 0 and 1 are used between steps
+    - rng: np.random.Generator for all random draws (default: a fresh one); pass the
+           same seeded generator every step to reproduce a run
     """
-    # 0. Clear previous fires (fire → empty) and suppressed → tree
-    grid[grid == 2] = 0
-    grid[grid == 3] = 1
-
-    # 1. Growth Phase: Empty sites become trees with probability p 
-    empty_mask = (grid == 0)
-    growth_roll = np.random.random(np.count_nonzero(empty_mask))
-    # build an explicit numpy int8 array from the boolean mask to avoid analyzer warnings
-    grid[empty_mask] = np.array(growth_roll < p, dtype=np.int8)
-
-    # 2. Lightning Phase: Trees are struck with probability f
-    tree_indices = np.argwhere(grid == 1)
-    if len(tree_indices) > 0:
-        lightning_roll = np.random.random(len(tree_indices))
-        strikes = tree_indices[lightning_roll < f]
-
-        # 3. Burning Phase: Burn the whole connected cluster 
-        for start_pos in strikes:
-            # Re-check if site is still a tree (might have burned in this step)
-            if grid[start_pos[0], start_pos[1]] == 1:
-                size = burn_step(grid, start_pos[0], start_pos[1], L, suppress=suppress, advanced_state=advanced_state)
-                fire_sizes.append(size)
\ No newline at end of file
+    _ensure_buffers(L)
+    rng = np.random.default_rng() if rng is None else rng
+    n_fires = step_nb(grid, _FIRES, p, f, suppress, 3 if advanced_state else 1, _SX, _SY, rng)
+    fire_sizes.extend(_FIRES[:n_fires].tolist())
+
+
+# Compile once at import (or load the on-disk cache) so the first strike does not pay for it
+burn_step(np.ones((2, 2), dtype=np.uint8), 0, 0, 2)
+burn_step(np.ones((2, 2), dtype=np.uint8), 0, 0, 2, connectivity=8)
+step(np.zeros((2, 2), dtype=np.uint8), [], 2, 0.5, 0.5)
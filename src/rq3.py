@@ -1,5 +1,9 @@
 import numpy as np
 from scipy.ndimage import label
+from numba import njit
+
+# Werkbuffers en de geometrische sprong worden gedeeld met het homogene model
+from src.drosselschwab import _ensure_buffers, _gap
 
 #Variable definitions
 EMPTY = 0
@@ -7,10 +11,96 @@ PINE = 1
 OAK = 2
 FIRE = 3
 
-def burn_step_inhomogeneous(grid, x, y, L, p_burn_oak=0.3, connectivity=4, advanced_state=False):
+
+@njit(cache=True)
+def _catches(grid, nx, ny, p_burn_oak, rng):
+    """Of een buur (of de startcel) vlam vat: dennen altijd, eiken met kans p_burn_oak."""
+    val = grid[nx, ny]
+    if val == PINE:
+        return True
+    # Elke brandende buur geeft een eik een eigen kans (Oak weerstand)
+    return val == OAK and rng.random() <= p_burn_oak
+
+
+@njit(cache=True, boundscheck=False)
+def _burn_inhomogeneous4(grid, x, y, L, p_burn_oak, burn_state, rng, stack):
+    """Gecompileerde flood-fill (4 buren); cellen staan op de stack als cx * L + cy.
+
+    Een cel wordt aangestoken op het moment dat hij op de stack gaat, dus elke
+    cel staat er hooguit een keer op en de stack heeft L * L plekken nodig.
+    De eik-worp gebeurt ook bij het pushen: een eik die de worp verliest blijft
+    OAK en krijgt van elke volgende brandende buur een nieuwe worp, net als bij
+    check-on-pop, dus de verdeling van de brandgroottes is dezelfde.
+    """
+    if not _catches(grid, x, y, p_burn_oak, rng):
+        return 0
+    grid[x, y] = burn_state
+    stack[0] = x * L + y
+    sp = 1
+    burned_size = 1
+
+    while sp > 0:
+        sp -= 1
+        cx = stack[sp] // L
+        cy = stack[sp] % L
+
+        # Steek brandbare buren aan en zet ze op de stack
+        if cx > 0 and _catches(grid, cx - 1, cy, p_burn_oak, rng):
+            grid[cx - 1, cy] = burn_state
+            stack[sp] = (cx - 1) * L + cy
+            sp += 1
+            burned_size += 1
+        if cy > 0 and _catches(grid, cx, cy - 1, p_burn_oak, rng):
+            grid[cx, cy - 1] = burn_state
+            stack[sp] = cx * L + cy - 1
+            sp += 1
+            burned_size += 1
+        if cy + 1 < L and _catches(grid, cx, cy + 1, p_burn_oak, rng):
+            grid[cx, cy + 1] = burn_state
+            stack[sp] = cx * L + cy + 1
+            sp += 1
+            burned_size += 1
+        if cx + 1 < L and _catches(grid, cx + 1, cy, p_burn_oak, rng):
+            grid[cx + 1, cy] = burn_state
+            stack[sp] = (cx + 1) * L + cy
+            sp += 1
+            burned_size += 1
+
+    return burned_size
+
+
+@njit(cache=True, boundscheck=False)
+def _burn_inhomogeneous8(grid, x, y, L, p_burn_oak, burn_state, rng, stack):
+    """Als _burn_inhomogeneous4, voor de 8 buren (Moore)."""
+    if not _catches(grid, x, y, p_burn_oak, rng):
+        return 0
+    grid[x, y] = burn_state
+    stack[0] = x * L + y
+    sp = 1
+    burned_size = 1
+
+    while sp > 0:
+        sp -= 1
+        cx = stack[sp] // L
+        cy = stack[sp] % L
+
+        # De cel zelf brandt al, dus die vat geen vlam meer
+        for nx in range(max(cx - 1, 0), min(cx + 2, L)):
+            for ny in range(max(cy - 1, 0), min(cy + 2, L)):
+                if _catches(grid, nx, ny, p_burn_oak, rng):
+                    grid[nx, ny] = burn_state
+                    stack[sp] = nx * L + ny
+                    sp += 1
+                    burned_size += 1
+
+    return burned_size
+
+
+def burn_step_inhomogeneous(grid, x, y, L, p_burn_oak=0.3, connectivity=4, advanced_state=False, rng=None):
     """
-    Berekent de brandgrootte met een STACK (Iteratief).
+    Berekent de brandgrootte met een STACK (Iteratief, gecompileerd met Numba).
     Dit is veiliger dan recursie voor grote grids (voorkomt RecursionError).
+    rng: np.random.Generator voor de eik-weerstand (standaard: een nieuwe per aanroep).
     """
     # Check startconditie
     if x < 0 or x >= L or y < 0 or y >= L:
@@ -18,109 +108,75 @@ def burn_step_inhomogeneous(grid, x, y, L, p_burn_oak=0.3, connectivity=4, advan
     if grid[x, y] == EMPTY or grid[x, y] == FIRE:
         return 0
 
-    if connectivity == 8:
-        neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-    else:
-        neighbors = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-    burned_size = 0
-    stack = [(x, y)]
-
-    while stack:
-        cx, cy = stack.pop()
-
-        # Check of we deze cel nog moeten verwerken
-        val = grid[cx, cy]
-        if val == EMPTY or val == FIRE:
-            continue
-        
-        # Check Oak weerstand
-        if val == OAK:
-            if np.random.rand() > p_burn_oak:
-                continue # Eik weigert te branden
-
-        # Steek aan
-        grid[cx, cy] = FIRE if advanced_state else EMPTY
-        burned_size += 1
-
-        # Voeg buren toe aan stack
-        for dx, dy in neighbors:
-            nx, ny = cx + dx, cy + dy
-            if 0 <= nx < L and 0 <= ny < L:
-                cell_value = grid[nx, ny]
-                
-                # Voeg alleen toe als het brandbaar is (PINE of OAK)
-                if cell_value == PINE or cell_value == OAK:
-                    stack.append((nx, ny))
-        
-    return burned_size
+    stack, _, _ = _ensure_buffers(L)
 
-def step_inhomogeneous(grid, fire_sizes, L, p, f, oak_ratio=0.3, p_burn_oak=0.3, advanced_state=False):
+    burn = _burn_inhomogeneous8 if connectivity == 8 else _burn_inhomogeneous4
+    return burn(grid, x, y, L, p_burn_oak, FIRE if advanced_state else EMPTY,
+                np.random.default_rng() if rng is None else rng, stack)
+
+@njit(cache=True, boundscheck=False)
+def _step_nb(grid, fire_buf, p, f, oak_ratio, oak_mask, p_burn_oak, burn_state, rng, stack):
+    """
+    Gecompileerde stap: vuur opruimen, groeien, bliksem en branden in twee rondes over het grid.
+    Nieuwe bomen zijn eiken volgens oak_mask, of met kans oak_ratio als oak_mask None is.
+    De brandgroottes komen in fire_buf; het aantal branden wordt teruggegeven.
+    """
+    L = grid.shape[0]
+    log_p = np.log1p(-p) if p < 1.0 else -np.inf
+    log_f = np.log1p(-f) if f < 1.0 else -np.inf
+
+    # 0./1. Vuur van de vorige stap wordt leeg, daarna groei op lege cellen
+    skip = _gap(log_p, rng)
+    for i in range(L):
+        for j in range(L):
+            v = grid[i, j]
+            if v == FIRE:
+                v = EMPTY
+            # Tellen zonder sprong op de celwaarde; alleen een nieuwe boom vertakt
+            skip -= v == EMPTY
+            if skip < 0:
+                if oak_mask is None:
+                    v = OAK if rng.random() < oak_ratio else PINE
+                else:
+                    v = OAK if oak_mask[i, j] else PINE
+                skip = _gap(log_p, rng)
+            grid[i, j] = v
+
+    # 2. Bliksem: elke niet-lege cel wordt met kans f getroffen en brandt meteen.
+    # Een cel die deze stap al brandt (FIRE) of een eik die weigert geeft, zoals voorheen, een brand van 0.
+    n_fires = 0
+    skip = _gap(log_f, rng)
+    for i in range(L):
+        for j in range(L):
+            skip -= grid[i, j] != EMPTY
+            if skip < 0:
+                skip = _gap(log_f, rng)
+                fire_buf[n_fires] = _burn_inhomogeneous4(grid, i, j, L, p_burn_oak, burn_state, rng, stack)
+                n_fires += 1
+    return n_fires
+
+
+def _step(grid, fire_sizes, L, p, f, oak_ratio, oak_mask, p_burn_oak, advanced_state, rng):
+    stack, _, fires = _ensure_buffers(L)
+    # Zonder rng een nieuwe generator per aanroep, zodat geforkte processen geen stroom delen
+    rng = np.random.default_rng() if rng is None else rng
+    n_fires = _step_nb(grid, fires, p, f, oak_ratio, oak_mask, p_burn_oak,
+                       FIRE if advanced_state else EMPTY, rng, stack)
+    fire_sizes.extend(fires[:n_fires].tolist())
+
+def step_inhomogeneous(grid, fire_sizes, L, p, f, oak_ratio=0.3, p_burn_oak=0.3, advanced_state=False, rng=None):
     """
     Standaard Random Model (Hagelslag).
+    rng: np.random.Generator voor alle trekkingen (standaard: een nieuwe per aanroep).
     """
-    grid[grid == FIRE] = EMPTY
-
-    empty_mask = (grid == EMPTY)
-    num_empty = np.count_nonzero(empty_mask)
-
-    # 1. Groei
-    if num_empty > 0:
-        growth_roll = np.random.random(num_empty)
-        new_tree_indices = np.where(growth_roll < p)[0]
-        new_values = np.full(len(new_tree_indices), PINE, dtype=np.int8)
-        type_roll = np.random.random(len(new_tree_indices))
-        new_values[type_roll < oak_ratio] = OAK
-        flat_indices = np.flatnonzero(empty_mask)
-        grid.ravel()[flat_indices[new_tree_indices]] = new_values
-
-    # 2. Bliksem
-    tree_indices = np.argwhere(grid > EMPTY)
-    if len(tree_indices) > 0:
-        lightning_roll = np.random.random(len(tree_indices))
-        strikes = tree_indices[lightning_roll < f]
-        for start_pos in strikes:
-            if grid[start_pos[0], start_pos[1]] != EMPTY:
-                # FIX: Zet NIET eerst op FIRE, laat de functie dat doen!
-                burned_size = burn_step_inhomogeneous(
-                    grid, start_pos[0], start_pos[1], L,
-                    p_burn_oak=p_burn_oak, advanced_state=advanced_state
-                )
-                fire_sizes.append(burned_size)
-
-def step_inhomogeneous_spatial(grid, fire_sizes, L, p, f, oak_mask, p_burn_oak=0.3, advanced_state=False):
+    _step(grid, fire_sizes, L, p, f, oak_ratio, None, p_burn_oak, advanced_state, rng)
+
+def step_inhomogeneous_spatial(grid, fire_sizes, L, p, f, oak_mask, p_burn_oak=0.3, advanced_state=False, rng=None):
     """
     Slime Mold Model (Spatial).
+    rng: np.random.Generator voor alle trekkingen (standaard: een nieuwe per aanroep).
     """
-    grid[grid == FIRE] = EMPTY
-
-    # 1. Groei
-    empty_mask = (grid == EMPTY)
-    num_empty = np.count_nonzero(empty_mask)
-
-    if num_empty > 0:
-        growth_roll = np.random.random(num_empty)
-        new_tree_indices_flat = np.where(growth_roll < p)[0]
-        flat_indices_all = np.flatnonzero(empty_mask)
-        grow_indices_flat = flat_indices_all[new_tree_indices_flat]
-        grow_x, grow_y = np.unravel_index(grow_indices_flat, (L, L))
-        is_oak = oak_mask[grow_x, grow_y]
-        grid[grow_x, grow_y] = np.where(is_oak, OAK, PINE)
-
-    # 2. Bliksem
-    tree_indices = np.argwhere(grid > EMPTY)
-    if len(tree_indices) > 0:
-        lightning_roll = np.random.random(len(tree_indices))
-        strikes = tree_indices[lightning_roll < f]
-        
-        for start_pos in strikes:
-            if grid[start_pos[0], start_pos[1]] != EMPTY:
-                # FIX: Zet NIET eerst op FIRE, laat de functie dat doen!
-                burned_size = burn_step_inhomogeneous(
-                    grid, start_pos[0], start_pos[1], L,
-                    p_burn_oak=p_burn_oak, advanced_state=advanced_state
-                )
-                fire_sizes.append(burned_size)
+    _step(grid, fire_sizes, L, p, f, 0.0, oak_mask, p_burn_oak, advanced_state, rng)
 
 def _compute_cluster_sizes(grid):
     """Helper voor statistieken."""
@@ -129,4 +185,10 @@ def _compute_cluster_sizes(grid):
     labeled_array, num_features = label(tree_mask, structure=structure)
     if num_features == 0:
         return np.array([])
-    return np.bincount(labeled_array.ravel())[1:]
\ No newline at end of file
+    return np.bincount(labeled_array.ravel())[1:]
+
+# Compileer bij import (of laad de cache op schijf) zodat de eerste brand daar niet op wacht
+burn_step_inhomogeneous(np.ones((2, 2), dtype=np.uint8), 0, 0, 2, rng=np.random.default_rng(0))
+burn_step_inhomogeneous(np.ones((2, 2), dtype=np.uint8), 0, 0, 2, connectivity=8, rng=np.random.default_rng(0))
+step_inhomogeneous(np.zeros((2, 2), dtype=np.uint8), [], 2, 0.5, 0.5)
+step_inhomogeneous_spatial(np.zeros((2, 2), dtype=np.uint8), [], 2, 0.5, 0.5, np.zeros((2, 2), dtype=bool))
@@ -1,14 +1,121 @@
 import numpy as np
-from scipy.ndimage import gaussian_filter
+from numba import njit
 
-def generate_slime_mold_mask(L, ratio, steps=300):
+# Diffuse & Decay per stap: gaussian blur (sigma 0.5, 5 taps) en decay 0.90.
+# De blur is scheidbaar, dus twee 1D rondes; de decay zit verdeeld over beide kernels.
+_DIFFUSE_KERNEL = np.exp(-0.5 * (np.arange(-2, 3) / 0.5) ** 2)
+_DIFFUSE_KERNEL *= np.sqrt(0.90) / _DIFFUSE_KERNEL.sum()
+_DIFFUSE_KERNEL = _DIFFUSE_KERNEL.astype(np.float32)
+
+
+@njit(cache=True)
+def _wrap(v, L):
+    """v % L voor een v die hooguit een paar keer L buiten [0, L) ligt, zonder deling."""
+    while v < 0:
+        v += L
+    while v >= L:
+        v -= L
+    return v
+
+
+@njit(cache=True, boundscheck=False)
+def _diffuse(trail_map, blurred, k):
+    """C. Diffuse & Decay in place: k langs de rijen naar blurred, dan langs de kolommen terug.
+
+    Torus world, dus de blur loopt ook rond over de rand.
+    """
+    L = trail_map.shape[0]
+    k0, k1, k2, k3, k4 = k[0], k[1], k[2], k[3], k[4]
+    for i in range(L):
+        im2 = (i - 2) % L
+        im1 = (i - 1) % L
+        ip1 = (i + 1) % L
+        ip2 = (i + 2) % L
+        for j in range(L):
+            blurred[i, j] = (k0 * trail_map[im2, j] + k1 * trail_map[im1, j] + k2 * trail_map[i, j]
+                             + k3 * trail_map[ip1, j] + k4 * trail_map[ip2, j])
+    for i in range(L):
+        row = blurred[i]
+        out = trail_map[i]
+        for j in range(L):
+            jm2 = j - 2 if j >= 2 else j - 2 + L
+            jm1 = j - 1 if j >= 1 else j - 1 + L
+            jp1 = j + 1 if j + 1 < L else j + 1 - L
+            jp2 = j + 2 if j + 2 < L else j + 2 - L
+            out[j] = k0 * row[jm2] + k1 * row[jm1] + k2 * row[j] + k3 * row[jp1] + k4 * row[jp2]
+
+
+@njit(cache=True)
+def _move_and_deposit(agents_x, agents_y, heading_cos, heading_sin, trail_map):
+    """A./B. Elke agent zet een stap, loopt rond over de rand en laat spoor achter."""
+    L = trail_map.shape[0]
+    for i in range(agents_x.size):
+        agents_x[i] = _wrap(agents_x[i] + heading_cos[i], L)
+        agents_y[i] = _wrap(agents_y[i] + heading_sin[i], L)
+        trail_map[int(agents_x[i]), int(agents_y[i])] += 1.0
+
+
+@njit(cache=True)
+def _sense_and_rotate(agents_x, agents_y, agents_angle, heading_cos, heading_sin, trail_map,
+                      sensor_angle, sensor_dist, turn_angle, rng):
+    """D. Elke agent ruikt links, midden en rechts voor zich en draait naar het sterkste spoor.
+
+    Daarna altijd een heel klein beetje willekeur uit rng, zodat ze niet vastlopen.
+    heading_cos/heading_sin houden cos en sin van agents_angle bij voor de volgende stap.
+    """
+    L = trail_map.shape[0]
+    # De zijsensoren via de somformules: twee sin/cos per agent in plaats van zes
+    cos_s = np.cos(sensor_angle)
+    sin_s = np.sin(sensor_angle)
+    for i in range(agents_x.size):
+        x = agents_x[i]
+        y = agents_y[i]
+        a = agents_angle[i]
+        cos_a = heading_cos[i]
+        sin_a = heading_sin[i]
+        # Posities van de 3 sensoren (Links, Midden, Rechts) + wrap around
+        val_L = trail_map[int(_wrap(x + (cos_a * cos_s + sin_a * sin_s) * sensor_dist, L)),
+                          int(_wrap(y + (sin_a * cos_s - cos_a * sin_s) * sensor_dist, L))]
+        val_C = trail_map[int(_wrap(x + cos_a * sensor_dist, L)),
+                          int(_wrap(y + sin_a * sensor_dist, L))]
+        val_R = trail_map[int(_wrap(x + (cos_a * cos_s - sin_a * sin_s) * sensor_dist, L)),
+                          int(_wrap(y + (sin_a * cos_s + cos_a * sin_s) * sensor_dist, L))]
+        # Links het sterkst -> draai links, rechts het sterkst -> draai rechts, anders rechtdoor
+        if val_L > val_C and val_L > val_R:
+            a -= turn_angle
+        elif val_R > val_C and val_R > val_L:
+            a += turn_angle
+        a += (rng.random() - 0.5) * 0.5
+        agents_angle[i] = a
+        heading_cos[i] = np.cos(a)
+        heading_sin[i] = np.sin(a)
+
+
+def _threshold(trail_map, ratio, buf):
+    """Het (1 - ratio)-percentiel van trail_map, lineair geinterpoleerd zoals np.percentile.
+
+    Alleen de twee omliggende waarden worden op hun plek gezet, in buf (zelfde grootte, geen kopie).
+    """
+    k = (trail_map.size - 1) * (1 - ratio)
+    lo = int(np.floor(k))
+    hi = min(lo + 1, trail_map.size - 1)
+    ordered = buf.ravel()
+    ordered[:] = trail_map.ravel()
+    ordered.partition([lo, hi])
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def generate_slime_mold_mask(L, ratio, steps=300, rng=None):
     """
     Generates a binary mask (L x L) based on a Slime Mold simulation.
     - True (1) = Position for an Oak (the veins of the slime mold)
     - False (0) = Position for a Pine
     
     The function ensures that EXACTLY 'ratio' percent of the board is True.
+    All randomness is drawn from rng, a np.random.Generator (a fresh one if None).
     """
+    rng = np.random.default_rng() if rng is None else rng
+
     # Settings for Physarum (The Intelligent Settings)
     num_agents = int(L * L * 0.15) # Iets meer agents voor betere verbindingen
     
@@ -18,72 +125,30 @@ def generate_slime_mold_mask(L, ratio, steps=300):
     turn_angle = np.pi / 2     # Hoe scherp kunnen ze draaien?
     
     # 1. Initialization
-    agents_x = np.random.rand(num_agents) * L
-    agents_y = np.random.rand(num_agents) * L
-    agents_angle = np.random.rand(num_agents) * 2 * np.pi
-    trail_map = np.zeros((L, L))
+    agents_x = rng.random(num_agents) * L
+    agents_y = rng.random(num_agents) * L
+    agents_angle = rng.random(num_agents) * 2 * np.pi
+    # cos en sin van de kijkrichting, gedeeld door beweging en sensoren
+    heading_cos = np.cos(agents_angle)
+    heading_sin = np.sin(agents_angle)
+    # float32 is precies genoeg voor het spoor en halveert het geheugenverkeer van blur en sensoren
+    trail_map = np.zeros((L, L), dtype=np.float32)
+    blurred = np.empty((L, L), dtype=np.float32)  # buffer voor de eerste blur-richting
     
     # 2. Simulation Loop
     for _ in range(steps):
-        # A. Movement
-        agents_x += np.cos(agents_angle)
-        agents_y += np.sin(agents_angle)
-        
-        # Wrap around (torus world)
-        agents_x %= L
-        agents_y %= L
-        
-        # B. Deposit (Leave trail)
-        ix = agents_x.astype(int)
-        iy = agents_y.astype(int)
-        np.add.at(trail_map, (ix, iy), 1.0)
+        # A./B. Movement, wrap around (torus world) en deposit
+        _move_and_deposit(agents_x, agents_y, heading_cos, heading_sin, trail_map)
         
         # C. Diffuse & Decay (Scherpere settings voor aders)
-        # sigma: 0.8 -> 0.6 (Minder blur)
-        # decay: 0.95 -> 0.92 (Oude paden verdwijnen sneller)
-        trail_map = gaussian_filter(trail_map, sigma=0.5) * 0.90
-        
-        # D. Sense & Rotate (The Advanced Logic)
-        
-        # 1. Bereken posities van de 3 sensoren (Links, Midden, Rechts)
-        angle_L = agents_angle - sensor_angle
-        angle_C = agents_angle
-        angle_R = agents_angle + sensor_angle
-        
-        # Coördinaten berekenen + Wrap around (% L)
-        # We moeten dit omzetten naar integers om in de map te kijken
-        xL = (agents_x + np.cos(angle_L) * sensor_dist) % L
-        yL = (agents_y + np.sin(angle_L) * sensor_dist) % L
-        
-        xC = (agents_x + np.cos(angle_C) * sensor_dist) % L
-        yC = (agents_y + np.sin(angle_C) * sensor_dist) % L
-        
-        xR = (agents_x + np.cos(angle_R) * sensor_dist) % L
-        yR = (agents_y + np.sin(angle_R) * sensor_dist) % L
-        
-        # 2. Ruiken: Wat is de waarde op die plekken?
-        val_L = trail_map[xL.astype(int), yL.astype(int)]
-        val_C = trail_map[xC.astype(int), yC.astype(int)]
-        val_R = trail_map[xR.astype(int), yR.astype(int)]
-        
-        # 3. Sturen (Vectorized logic)
-        
-        # Conditie: Links is het sterkst -> Draai Links
-        mask_left = (val_L > val_C) & (val_L > val_R)
-        agents_angle[mask_left] -= turn_angle
-        
-        # Conditie: Rechts is het sterkst -> Draai Rechts
-        mask_right = (val_R > val_C) & (val_R > val_L)
-        agents_angle[mask_right] += turn_angle
-        
-        # Als Midden het sterkst is, doen we niks (rechtdoor).
+        _diffuse(trail_map, blurred, _DIFFUSE_KERNEL)
         
-        # Altijd een heel klein beetje willekeur toevoegen zodat ze niet vastlopen
-        agents_angle += (np.random.rand(num_agents) - 0.5) * 0.5
+        # D. Sense & Rotate (met een beetje willekeur)
+        _sense_and_rotate(agents_x, agents_y, agents_angle, heading_cos, heading_sin, trail_map,
+                          sensor_angle, sensor_dist, turn_angle, rng)
 
-    # 3. Thresholding
-    flattened = trail_map.flatten()
-    threshold_value = np.percentile(flattened, 100 - (ratio * 100))
+    # 3. Thresholding op het (1 - ratio)-percentiel
+    threshold_value = _threshold(trail_map, ratio, blurred)
     
     # Return binary mask (zoals je simulatie verwacht)
     oak_mask = trail_map > threshold_value
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from scipy.ndimage import label
+
+from src.drosselschwab import FireBuf, burn_step, step
+from src.rq3 import FIRE, burn_step_inhomogeneous
+from src.slimemold import _threshold, generate_slime_mold_mask
+from simulations.drosselschwab import _STRUCTURE, _compute_cluster_sizes
+
+
+def _forest(L, density, seed):
+    rng = np.random.default_rng(seed)
+    return (rng.random((L, L)) < density).astype(np.uint8)
+
+
+@pytest.mark.parametrize('connectivity', [4, 8])
+@pytest.mark.parametrize('seed', range(5))
+def test_burn_step_size_is_cells_set_on_fire(connectivity, seed):
+    grid = _forest(40, 0.55, seed)
+    x, y = np.argwhere(grid == 1)[0]
+    size = burn_step(grid, x, y, 40, connectivity=connectivity)
+    assert size == np.count_nonzero(grid == 2)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_step_fire_sizes_match_burned_cells(seed):
+    grid = _forest(48, 0.6, seed)
+    fire_sizes = []
+    step(grid, fire_sizes, 48, 0.0, 0.01, rng=np.random.default_rng(seed))
+    assert sum(fire_sizes) == np.count_nonzero(grid == 2)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_burn_step_inhomogeneous_size_is_cells_set_on_fire(seed):
+    rng = np.random.default_rng(seed)
+    grid = _forest(40, 0.7, seed)
+    grid[grid == 1] = rng.integers(1, 3, np.count_nonzero(grid))
+    x, y = np.argwhere(grid > 0)[0]
+    size = burn_step_inhomogeneous(grid, x, y, 40, advanced_state=True, rng=rng)
+    assert size == np.count_nonzero(grid == FIRE)
+
+
+@pytest.mark.parametrize('connectivity', [4, 8])
+@pytest.mark.parametrize('seed', range(5))
+def test_cluster_sizes_match_scipy_label(connectivity, seed):
+    mask = _forest(50, 0.5, seed).astype(bool)
+    sizes = _compute_cluster_sizes(mask, np.empty(mask.shape, dtype=np.int32), connectivity)
+
+    labels, n = label(mask, structure=_STRUCTURE[connectivity])
+    expected = [np.count_nonzero(labels == i) for i in range(1, n + 1)]
+    assert sizes.tolist() == expected
+    assert sizes.sum() == mask.sum()
+
+
+@pytest.mark.parametrize('ratio', [0.0, 0.1, 0.3, 0.5, 0.999, 1.0])
+def test_slime_mold_threshold_matches_percentile(ratio):
+    trail_map = np.random.default_rng(0).random((33, 33), dtype=np.float32)
+    buf = np.empty_like(trail_map)
+    expected = np.percentile(trail_map, 100 * (1 - ratio))
+    assert _threshold(trail_map, ratio, buf) == pytest.approx(expected, rel=1e-6)
+
+
+def test_slime_mold_mask_is_reproducible():
+    a = generate_slime_mold_mask(32, 0.3, steps=20, rng=np.random.default_rng(1))
+    b = generate_slime_mold_mask(32, 0.3, steps=20, rng=np.random.default_rng(1))
+    assert a.dtype == bool and a.shape == (32, 32)
+    assert np.array_equal(a, b)
+
+
+def test_firebuf_round_trips():
+    sizes = np.random.default_rng(0).integers(1, 10_000, 5000)
+    buf = FireBuf(capacity=4)
+    for s in sizes[:1000]:
+        buf.append(s)
+    buf.extend(sizes[1000:3000].tolist())
+    buf.extend(sizes[3000:])
+    buf.extend([])
+
+    assert len(buf) == sizes.size
+    assert buf.array().dtype == np.int32
+    assert np.array_equal(buf.array(), sizes)
+
+
+def test_firebuf_starts_empty():
+    buf = FireBuf()
+    assert len(buf) == 0
+    assert buf.array().size == 0